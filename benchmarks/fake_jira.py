@@ -0,0 +1,182 @@
+"""A local stand-in for the JIRA REST API
+
+Serves the handful of endpoints the jira client uses to fetch issues, with
+configurable latency and rate limiting, so JIRA imports can be benchmarked
+without a real server.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import json
+import re
+import threading
+import time
+
+
+def _fields(query):
+    """Requested fields; clients send them comma-separated, repeated or both"""
+    return [
+        field for value in query.get('fields', [])
+        for field in value.split(',') if field
+    ]
+
+
+class FakeJiraServer():
+    """JIRA REST server holding raw issues in memory
+
+    Usage:
+
+        with FakeJiraServer(issues, latency=0.05) as server:
+            jira = JIRA(server.url, get_server_info=False)
+    """
+    def __init__(self,
+                 issues,
+                 latency=0.0,
+                 rate_limit=None,
+                 embedded_comments=None,
+                 moved=None):
+        """
+        Parameters:
+        issues (list): Raw issues (see benchmarks.synthetic.synthetic_issues)
+        latency (double): Seconds to wait before answering each request
+        rate_limit (double): Requests per second; requests over the limit get
+            429 with a Retry-After header
+        embedded_comments (int): Comments returned with an issue; the rest
+            are only served by the comment endpoint
+        moved (dict): Current key by old key, for issues moved between
+            projects; like JIRA, only direct requests resolve old keys
+        """
+        self.issues = {issue['key']: issue for issue in issues}
+        self.moved = moved or {}
+        self.embedded_comments = embedded_comments
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.requests = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+        self.allowed_at = 0.0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0),
+                                          self._handler_class())
+        self.server.daemon_threads = True
+        self.url = 'http://127.0.0.1:{}'.format(self.server.server_port)
+        self.thread = None
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _admit(self):
+        """Whether a request fits the rate limit (a leaky bucket)"""
+        with self.lock:
+            self.requests += 1
+            if self.rate_limit is None:
+                return True
+            now = time.time()
+            if self.allowed_at > now + 1.0:
+                self.rejected += 1
+                return False
+            self.allowed_at = max(self.allowed_at, now) + 1.0 / self.rate_limit
+            return True
+
+    def _issue(self, key, fields):
+        issue = self.issues[key]
+        if fields and fields != ['*all']:
+            issue = dict(issue,
+                         fields={
+                             name: value
+                             for name, value in issue['fields'].items()
+                             if name in fields
+                         })
+        comment = issue['fields'].get('comment')
+        if comment and self.embedded_comments is not None:
+            comments = comment['comments'][:self.embedded_comments]
+            issue = dict(issue,
+                         fields=dict(issue['fields'],
+                                     comment=dict(
+                                         comment,
+                                         comments=comments,
+                                         maxResults=len(comments))))
+        return dict(issue, self='{}/rest/api/2/issue/{}'.format(self.url, key))
+
+    def _comments(self, key, query):
+        start = int(query.get('startAt', ['0'])[0])
+        limit = int(query.get('maxResults', ['50'])[0])
+        comments = self.issues[key]['fields']['comment']['comments']
+        return {
+            'startAt': start,
+            'maxResults': limit,
+            'total': len(comments),
+            'comments': comments[start:start + limit]
+        }
+
+    def _search(self, query):
+        jql = query.get('jql', [''])[0]
+        start = int(query.get('startAt', ['0'])[0])
+        limit = int(query.get('maxResults', ['50'])[0])
+        fields = _fields(query)
+        keys = re.search(r'key in \(([^)]*)\)', jql)
+        keys = [key.strip() for key in keys.group(1).split(',')] if keys else []
+        found = [key for key in keys if key in self.issues]
+        return {
+            'startAt': start,
+            'maxResults': limit,
+            'total': len(found),
+            'issues':
+            [self._issue(key, fields) for key in found[start:start + limit]]
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body, headers=()):
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                time.sleep(server.latency)
+                if not server._admit():
+                    self._reply(429, {'errorMessages': ['Rate limited']},
+                                [('Retry-After', '1')])
+                    return
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                path = url.path.rstrip('/')
+                if path == '/rest/api/2/field':
+                    self._reply(200, [])
+                elif path == '/rest/api/2/serverInfo':
+                    self._reply(200, {'version': '8.0.0'})
+                elif path == '/rest/api/2/search':
+                    self._reply(200, server._search(query))
+                elif path.startswith('/rest/api/2/issue/'):
+                    key, _, rest = path[len('/rest/api/2/issue/'):].partition(
+                        '/')
+                    key = server.moved.get(key, key)
+                    if key not in server.issues:
+                        self._reply(404, {
+                            'errorMessages': ['Issue does not exist']
+                        })
+                    elif rest == 'comment':
+                        self._reply(200, server._comments(key, query))
+                    else:
+                        self._reply(200, server._issue(key, _fields(query)))
+                else:
+                    self._reply(404, {'errorMessages': ['Not found']})
+
+        return Handler
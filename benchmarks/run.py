@@ -0,0 +1,223 @@
+"""Benchmarks of the analysis and of importing tasks from JIRA
+
+Run from the root of the repository:
+
+    python -m benchmarks.run
+    python -m benchmarks.run --sizes 100 10000 --scenarios analyze.columnar
+
+Every result is printed as one line of JSON with the scenario, the number of
+tasks, the throughput (tasks per second, at the median time), the p50, p90
+and p99 of the time per run (or per JIRA request, for the serial imports)
+and the peak memory traced during one run. Redirect the output to a file to
+compare runs.
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+from benchmarks.synthetic import synthetic_backlog, synthetic_issues
+
+
+def percentile(seconds, q):
+    """Nearest-rank percentile"""
+    ordered = sorted(seconds)
+    index = max(0, int(round(q / 100.0 * len(ordered) + 0.5)) - 1)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def measure(run, repeat, latencies=None):
+    """Run repeat times, then once more under tracemalloc
+
+    Parameters:
+    run (callable): The code to measure
+    latencies (list): Appended to by run, with the seconds of every call it
+        makes; by default, the time of the whole run is the latency
+
+    Returns:
+    tuple: (seconds per run, latencies, peak bytes)
+    """
+    durations = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        run()
+        durations.append(time.perf_counter() - begin)
+    if latencies is None:
+        latencies = durations
+    else:
+        latencies = list(latencies)
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return durations, latencies, peak
+
+
+def report(scenario, tasks, durations, latencies, peak, **extra):
+    median = percentile(durations, 50)
+    print(json.dumps(
+        dict(scenario=scenario,
+             tasks=tasks,
+             throughput=tasks / median if median else None,
+             p50=percentile(latencies, 50),
+             p90=percentile(latencies, 90),
+             p99=percentile(latencies, 99),
+             peak_bytes=peak,
+             **extra)),
+          flush=True)
+
+
+def analyze_scenarios(args):
+    from taskbacklog.analysis import analyze
+    from taskbacklog.store import BacklogStore
+    from taskbacklog.stream import analyze_stream
+
+    for size in args.sizes:
+        pbis = synthetic_backlog(size,
+                                 fan_out=args.fan_out,
+                                 uncertainty=args.uncertainty)
+        store = BacklogStore.from_pbis(pbis)
+        runs = {
+            'analyze.ufloat': lambda: analyze(lambda: pbis),
+            'analyze.columnar': lambda: analyze(lambda: pbis, columnar=True),
+            'analyze.store': lambda: analyze(store),
+            'analyze.stream':
+            lambda: list(analyze_stream(lambda: iter(pbis), every=None)),
+        }
+        for scenario, run in runs.items():
+            if scenario not in args.scenarios:
+                continue
+            if scenario == 'analyze.ufloat' and size > args.max_ufloat:
+                continue
+            report(scenario, size, *measure(run, args.repeat))
+
+
+def jira_scenarios(args):
+    from jira import JIRA
+
+    from benchmarks.fake_jira import FakeJiraServer
+    from taskbacklog.issues import JiraPool, Task, ValueDimensions
+
+    value_dimensions = ValueDimensions(0.1)
+    for size in sorted({min(size, args.max_jira) for size in args.sizes}):
+        # Stories have (fan_out - 1) / 2 subtasks on average.
+        stories = max(1, size * 2 // (args.fan_out + 1))
+        issues = synthetic_issues(stories,
+                                  fan_out=args.fan_out,
+                                  comments=args.comments)
+        jids = [
+            issue['key'] for issue in issues
+            if issue['key'].startswith('STORY-')
+        ]
+        tasks = len(issues) - len(jids)
+        with FakeJiraServer(issues,
+                            latency=args.latency,
+                            rate_limit=args.rate_limit,
+                            embedded_comments=args.embedded_comments) as server:
+
+            def connect():
+                return JIRA(server.url, get_server_info=False, max_retries=0)
+
+            Task.jira = connect()
+
+            latencies = []
+
+            def serial():
+                for jid in jids:
+                    begin = time.perf_counter()
+                    Task.from_jira_story(jid, value_dimensions, 2.0)
+                    latencies.append(time.perf_counter() - begin)
+
+            runs = {
+                'jira.serial':
+                serial,
+                'jira.batch':
+                lambda: Task.from_jira_story_batch(
+                    jids, value_dimensions, 2.0),
+                'jira.concurrent':
+                lambda: Task.from_jira_story_concurrent(
+                    jids,
+                    value_dimensions,
+                    2.0,
+                    max_workers=args.workers,
+                    pool=JiraPool(size=args.workers, connect=connect)),
+            }
+            for scenario, run in runs.items():
+                if scenario not in args.scenarios:
+                    continue
+                server.requests = server.rejected = 0
+                del latencies[:]
+                report(scenario,
+                       tasks,
+                       *measure(run,
+                                args.repeat,
+                                latencies if scenario == 'jira.serial' else
+                                None),
+                       requests=server.requests,
+                       rejected=server.rejected)
+
+
+scenarios = [
+    'analyze.ufloat', 'analyze.columnar', 'analyze.store', 'analyze.stream',
+    'jira.serial', 'jira.batch', 'jira.concurrent'
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes',
+                        type=int,
+                        nargs='+',
+                        default=[100, 10000, 100000],
+                        help='Numbers of tasks')
+    parser.add_argument('--scenarios',
+                        nargs='+',
+                        default=scenarios,
+                        choices=scenarios)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--fan-out',
+                        type=int,
+                        default=3,
+                        help='Maximum number of tasks per PBI or story')
+    parser.add_argument('--uncertainty',
+                        type=float,
+                        default=0.25,
+                        help='Relative std dev of estimates and values')
+    parser.add_argument('--comments',
+                        type=int,
+                        default=5,
+                        help='Comments per JIRA issue')
+    parser.add_argument('--embedded-comments',
+                        type=int,
+                        default=None,
+                        help='Comments the fake JIRA returns with an issue')
+    parser.add_argument('--latency',
+                        type=float,
+                        default=0.02,
+                        help='Seconds per fake JIRA request')
+    parser.add_argument('--rate-limit',
+                        type=float,
+                        default=None,
+                        help='Fake JIRA requests per second')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument(
+        '--max-ufloat',
+        type=int,
+        default=10000,
+        help='Skip analyze.ufloat above this many tasks; it takes minutes')
+    parser.add_argument(
+        '--max-jira',
+        type=int,
+        default=1000,
+        help='Import at most about this many tasks from the fake JIRA')
+    args = parser.parse_args(argv)
+    analyze_scenarios(args)
+    if any(scenario.startswith('jira.') for scenario in args.scenarios):
+        jira_scenarios(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Synthetic backlogs for benchmarks
+
+Sizes, subtask fan-out, uncertainty and comment counts are parameters; the
+same seed always produces the same backlog.
+"""
+from datetime import date, timedelta
+import random
+
+from uncertainties import ufloat
+
+from taskbacklog.issues import PBI, Task, ValueDimensions
+
+
+def synthetic_backlog(tasks, fan_out=3, uncertainty=0.25, seed=0):
+    """PBIs with about the given number of tasks in total
+
+    Parameters:
+    tasks (int): Number of tasks
+    fan_out (int): Maximum number of tasks per PBI
+    uncertainty (double): Std dev of estimates and values, relative to
+        their nominal values
+    seed (int): Random seed
+
+    Returns:
+    list: PBIs
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    dimensions = [
+        ValueDimensions(rng.uniform(0.0, 0.5),
+                        ufloat(rng.uniform(0, 4), uncertainty))
+        for _ in range(8)
+    ]
+    pbis = []
+    made = 0
+    while made < tasks:
+        count = min(rng.randint(1, fan_out), tasks - made)
+        value_dimensions = rng.choice(dimensions)
+        pbi_tasks = []
+        for _ in range(count):
+            hours = rng.lognormvariate(0.5, 0.8)
+            pbi_tasks.append(
+                Task(summary='Task {}'.format(made),
+                     estimate=ufloat(hours, uncertainty * hours),
+                     value_dimensions=value_dimensions,
+                     wip_ratio=rng.choice([1.0, 1.0, 1.0, 0.7, 0.5]),
+                     url=('https://example.com/{}'.format(made)
+                          if rng.random() < 0.8 else None)))
+            made += 1
+        value = rng.lognormvariate(2.0, 1.0)
+        pbis.append(
+            PBI(T='PBI {}'.format(len(pbis)),
+                V_units=ufloat(value, uncertainty * value),
+                creation_date=today - timedelta(days=rng.randint(0, 90)),
+                value_dimensions=value_dimensions,
+                tasks=pbi_tasks))
+    return pbis
+
+
+def synthetic_issues(stories, fan_out=3, comments=5, seed=0):
+    """Raw JIRA issues (as returned by the REST API) for stories and subtasks
+
+    Parameters:
+    stories (int): Number of stories; keys are STORY-<n>
+    fan_out (int): Maximum number of subtasks per story; keys are TASK-<n>
+    comments (int): Comments per issue; about a third mention a merge
+        request
+
+    Returns:
+    list: Raw issues (dicts)
+    """
+    rng = random.Random(seed)
+    issues = []
+
+    def issue(key, subtasks=()):
+        return {
+            'id': str(len(issues)),
+            'key': key,
+            'fields': {
+                'subtasks': [{
+                    'key': subtask
+                } for subtask in subtasks],
+                'timeestimate':
+                rng.choice([None, 3600, 7200, 14400]),
+                'status': {
+                    'name':
+                    rng.choice(['Open', 'Developing', 'Submitted', 'Complete'])
+                },
+                'summary':
+                'Summary of {}'.format(key),
+                'created':
+                '2020-01-01T00:00:00.000+0000',
+                'updated':
+                '2020-01-02T00:00:00.000+0000',
+                'description':
+                'Description of {}. '.format(key) * rng.randint(1, 50),
+                'reporter':
+                None,
+                'assignee':
+                rng.choice([None, {
+                    'name': 'vandebun'
+                }, {
+                    'name': 'someone'
+                }]),
+                'comment': {
+                    'total':
+                    comments,
+                    'comments': [{
+                        'id':
+                        '{}-{}'.format(key, i),
+                        'body':
+                        ('Opened [a merge request|https://git.example.com/'
+                         '{}/{}]'.format(key, i) if i % 3 == 0 else
+                         'Comment {} on {}'.format(i, key))
+                    } for i in range(comments)]
+                },
+            }
+        }
+
+    task_number = 0
+    for number in range(stories):
+        subtasks = [
+            'TASK-{}'.format(task_number + i)
+            for i in range(rng.randint(0, fan_out))
+        ]
+        task_number += len(subtasks)
+        issues.append(issue('STORY-{}'.format(number), subtasks))
+        issues.extend(issue(subtask) for subtask in subtasks)
+    return issues
@@ -1,10 +1,785 @@
+import collections
+import numpy as np
 import pandas as pd
-from IPython.core.display import display, Markdown
+import threading
 from datetime import date
-from taskbacklog.issues import ureg
 
+from taskbacklog import instrument
 
-def perform_analysis(fetch_ideas):
+
+def nominal_std(x):
+    """Split a ufloat (or a plain number) into (nominal value, std dev)"""
+    if hasattr(x, 'std_dev'):
+        return x.nominal_value, x.std_dev
+    return float(x), 0.0
+
+
+def task_columns(pbis):
+    """Inputs to the weight of every task, one row per task
+
+    Every uncertain quantity is split into a nominal value column and a std
+    dev column. Each PBI and each ValueDimensions is converted only once,
+    however many tasks refer to it.
+
+    Returns:
+    pd.DataFrame: summary, url, age, pbi (index of the PBI),
+        value_dimensions (index of the distinct ValueDimensions), wip_ratio
+        and the nominal/std columns of estimate, value (V of the PBI),
+        learning_ratio and other (hours)
+    """
+    today = date.today()
+    dimensions = {}
+    dimension_columns = []
+    rows = []
+    for pbi_index, pbi in enumerate(pbis):
+        value = nominal_std(pbi.V)
+        age = (today - pbi.creation_date).days
+        for task in pbi.tasks:
+            vd = task.value_dimensions
+            if id(vd) not in dimensions:
+                dimensions[id(vd)] = len(dimension_columns)
+                dimension_columns.append(
+                    nominal_std(vd.learning_ratio) +
+                    nominal_std(vd.other_hours))
+            estimate = nominal_std(task.E)
+            rows.append((task.summary, task.url, age, pbi_index,
+                         dimensions[id(vd)], task.wip_ratio) + estimate +
+                        value)
+    columns = pd.DataFrame(rows,
+                           columns=[
+                               'summary', 'url', 'age', 'pbi',
+                               'value_dimensions', 'wip_ratio',
+                               'estimate_nominal', 'estimate_std',
+                               'value_nominal', 'value_std'
+                           ])
+    dimension_columns = np.array(dimension_columns, dtype=float).reshape(
+        -1, 4)[columns.value_dimensions.values.astype(int)]
+    for i, name in enumerate([
+            'learning_ratio_nominal', 'learning_ratio_std', 'other_nominal',
+            'other_std'
+    ]):
+        columns[name] = dimension_columns[:, i]
+    return columns
+
+
+def weight_columns(columns):
+    """Weight of every task, with first-order error propagation
+
+    The same weight perform_analysis computes with ufloats,
+
+        W = (V * E / E_pbi + learning_ratio * E + other) / (E * wip_ratio)
+
+    where E_pbi is the sum of the estimates of the tasks of the PBI, but
+    evaluated on whole columns. V, every E, the learning ratio and the other
+    value are treated as independent; ufloats would also track correlations
+    between them (e.g. subtasks sharing the estimate of their story).
+
+    Parameters:
+    columns (pd.DataFrame): See task_columns
+
+    Returns:
+    (np.array, np.array): Nominal values and std devs of the weights
+    """
+    E = columns.estimate_nominal.values
+    E_std = columns.estimate_std.values
+    by_pbi = columns.groupby('pbi')
+    E_pbi = by_pbi.estimate_nominal.transform('sum').values
+    E_pbi_var = (columns.estimate_std**2).groupby(
+        columns.pbi).transform('sum').values
+    V = columns.value_nominal.values
+    learning_ratio = columns.learning_ratio_nominal.values
+    other = columns.other_nominal.values
+    wip_ratio = columns.wip_ratio.values.astype(float)
+
+    weight = (V / E_pbi + learning_ratio + other / E) / wip_ratio
+
+    # Partial derivatives of W. E of this task enters both through E_pbi and
+    # directly; the estimates of the other tasks of the PBI only through
+    # E_pbi.
+    d_V = 1.0 / (E_pbi * wip_ratio)
+    d_E_pbi = -V / (E_pbi**2 * wip_ratio)
+    d_E = d_E_pbi - other / (E**2 * wip_ratio)
+    d_learning_ratio = 1.0 / wip_ratio
+    d_other = 1.0 / (E * wip_ratio)
+    variance = ((d_V * columns.value_std.values)**2 + d_E_pbi**2 *
+                (E_pbi_var - E_std**2) + (d_E * E_std)**2 +
+                (d_learning_ratio * columns.learning_ratio_std.values)**2 +
+                (d_other * columns.other_std.values)**2)
+    return weight, np.sqrt(np.maximum(variance, 0.0))
+
+
+def weight_part_columns(columns):
+    """The two parts of the weight of every task, with their std devs
+
+    W = V / (E_pbi * wip_ratio) + (learning_ratio + other / E) / wip_ratio:
+    the share of the task in the value of its PBI, and the value of the task
+    itself (its value dimensions). Each part is propagated on its own, as in
+    weight_columns; the correlation between them (through E) is ignored.
+
+    Parameters:
+    columns (pd.DataFrame): See task_columns
+
+    Returns:
+    (np.array, np.array, np.array, np.array): Nominal values and std devs of
+        the shares, then of the own values
+    """
+    E = columns.estimate_nominal.values
+    E_std = columns.estimate_std.values
+    E_pbi = columns.groupby('pbi').estimate_nominal.transform('sum').values
+    E_pbi_var = (columns.estimate_std**2).groupby(
+        columns.pbi).transform('sum').values
+    V = columns.value_nominal.values
+    other = columns.other_nominal.values
+    wip_ratio = columns.wip_ratio.values.astype(float)
+
+    share = V / (E_pbi * wip_ratio)
+    share_variance = ((columns.value_std.values / (E_pbi * wip_ratio))**2 +
+                      (V / (E_pbi**2 * wip_ratio))**2 * E_pbi_var)
+    own = (columns.learning_ratio_nominal.values + other / E) / wip_ratio
+    own_variance = ((columns.learning_ratio_std.values / wip_ratio)**2 +
+                    (columns.other_std.values / (E * wip_ratio))**2 +
+                    (other * E_std / (E**2 * wip_ratio))**2)
+    return share, np.sqrt(share_variance), own, np.sqrt(own_variance)
+
+
+def calendar_distance(estimate_nominal, estimate_std=None, groups=None):
+    """Hours of work up to and including every task, in the given order
+
+    A running sum of nominal estimates, plus optionally its std dev, in
+    linear time and memory (a cumsum of ufloats is quadratic: every partial
+    sum tracks its derivative with respect to every earlier estimate).
+
+    Parameters:
+    estimate_nominal (array-like): Nominal estimates, in schedule order
+    estimate_std (array-like): Std devs of the estimates; the estimates are
+        assumed independent unless groups is given
+    groups (array-like): A label per task, e.g. its ValueDimensions. The
+        estimates of tasks with the same label are treated as fully
+        correlated (they tend to be off in the same direction), so their
+        std devs add linearly within a label rather than in quadrature.
+
+    Returns:
+    (np.array, np.array): Distance and its std dev (None without
+        estimate_std)
+    """
+    distance = np.cumsum(np.asarray(estimate_nominal, dtype=float))
+    if estimate_std is None:
+        return distance, None
+    estimate_std = np.asarray(estimate_std, dtype=float)
+    if groups is None:
+        return distance, np.sqrt(np.cumsum(estimate_std**2))
+    # Every task grows the std dev of its group from s - std to s; the
+    # variance of the total grows by the difference of the squares.
+    group_std = pd.Series(estimate_std).groupby(
+        np.asarray(groups)).cumsum().values
+    variance = np.cumsum(group_std**2 - (group_std - estimate_std)**2)
+    return distance, np.sqrt(variance)
+
+
+def monte_carlo_ranks(columns,
+                      samples=10000,
+                      top_k=5,
+                      max_bytes=256 * 2**20,
+                      seed=None):
+    """Rank tasks by sampled weights rather than by nominal weights
+
+    Draws samples of every V (per PBI), E (per task), learning ratio and
+    other value (per ValueDimensions) from independent normal distributions
+    and computes the weights of all tasks for a whole batch of samples at
+    once. Samples are processed in chunks so memory stays bounded however
+    many are requested.
+
+    Parameters:
+    columns (pd.DataFrame): See task_columns
+    samples (int): Number of samples
+    top_k (int): Size of the top of the backlog to report on
+    max_bytes (int): Approximate memory budget for one chunk
+    seed (int): Seed for reproducible samples
+
+    Returns:
+    pd.DataFrame: Indexed like columns, with p_top (probability the task is
+        among the top_k weightiest) and expected_rank (1 is weightiest)
+    """
+    random = np.random.RandomState(seed)
+    tasks = len(columns)
+    _, pbi = np.unique(columns.pbi.values, return_inverse=True)
+    _, dimensions = np.unique(columns.value_dimensions.values,
+                              return_inverse=True)
+
+    def first(name, labels):
+        # One value per PBI or ValueDimensions, from its first task.
+        values = np.zeros(labels.max() + 1)
+        values[labels[::-1]] = columns[name].values[::-1]
+        return values
+
+    V = first('value_nominal', pbi), first('value_std', pbi)
+    learning_ratio = (first('learning_ratio_nominal', dimensions),
+                      first('learning_ratio_std', dimensions))
+    other = (first('other_nominal', dimensions),
+             first('other_std', dimensions))
+    E = columns.estimate_nominal.values, columns.estimate_std.values
+    wip_ratio = columns.wip_ratio.values.astype(float)
+
+    # About ten (chunk, tasks) arrays of 8 bytes are alive at once.
+    chunk = max(1, min(samples, max_bytes // (80 * max(tasks, 1))))
+    rank_sum = np.zeros(tasks)
+    top_count = np.zeros(tasks)
+    positions = np.arange(tasks)
+    for begin in range(0, samples, chunk):
+        size = min(chunk, samples - begin)
+        sample_E = random.normal(E[0], E[1], (size, tasks))
+        # A normal distribution allows non-positive estimates; no task takes
+        # less than a hundredth of its nominal estimate.
+        sample_E = np.maximum(sample_E, 0.01 * E[0])
+        # Sum per PBI for every sample at once by giving the PBIs of each
+        # sample their own range of bins.
+        pbis = pbi.max() + 1
+        E_pbi = np.bincount(
+            (pbi + pbis * np.arange(size)[:, None]).ravel(),
+            weights=sample_E.ravel(),
+            minlength=size * pbis).reshape(size, pbis)
+        weight = ((random.normal(V[0], V[1], (size, len(V[0])))[:, pbi] *
+                   sample_E / E_pbi[:, pbi] +
+                   random.normal(learning_ratio[0], learning_ratio[1],
+                                 (size, len(learning_ratio[0])))[:, dimensions]
+                   * sample_E + random.normal(other[0], other[1],
+                                              (size, len(other[0])))
+                   [:, dimensions]) / (sample_E * wip_ratio))
+        order = np.argsort(-weight, axis=1)
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order,
+                          np.broadcast_to(positions, order.shape), axis=1)
+        rank_sum += ranks.sum(axis=0)
+        top_count += (ranks < top_k).sum(axis=0)
+
+    return pd.DataFrame(
+        {
+            'p_top': top_count / samples,
+            'expected_rank': rank_sum / samples + 1
+        },
+        index=columns.index)
+
+
+def _columnar_frame(columns):
+    from uncertainties import ufloat
+
+    weight, weight_std = weight_columns(columns)
+    E = columns.estimate_nominal.values
+    E_std = columns.estimate_std.values
+    # Only the final values become ufloats (for display and for callers of
+    # perform_analysis); none of the arithmetic above touched one.
+    full = pd.DataFrame({
+        'summary': columns.summary,
+        'estimate': [ufloat(n, s) for n, s in zip(E, E_std)],
+        'weight': [ufloat(n, s) for n, s in zip(weight, weight_std)],
+        'url': columns.url,
+        'age': columns.age,
+        # See Task.Timebox
+        'Timebox': E + 2 * E_std,
+        'wip_ratio': columns.wip_ratio,
+    })
+    nominal = pd.DataFrame({'weight': weight, 'estimate': E})
+    std = pd.DataFrame({'weight': weight_std, 'estimate': E_std})
+    return full, nominal, std, columns.value_dimensions
+
+
+def analyze(fetch_ideas,
+            columnar=False,
+            distance_std=False,
+            correlated=False,
+            samples=0,
+            top_k=5,
+            dedupe=False,
+            seed=None):
+    """Tabulate the tasks of every PBI, weightiest first
+
+    The computation behind perform_analysis, without plotting or display.
+
+    Parameters:
+    fetch_ideas (callable): Returns the PBIs; or a
+        taskbacklog.store.BacklogStore, which implies columnar
+    columnar (bool): Compute on NumPy columns of nominal values and std devs
+        rather than with one ufloat per quantity; much faster on large
+        backlogs. See weight_columns.
+    distance_std (bool): Add a calendar_distance_std column
+    correlated (bool): Treat the estimates of tasks sharing a
+        ValueDimensions as correlated in calendar_distance_std. See
+        calendar_distance.
+    samples (int): Sort by expected rank over this many Monte Carlo samples
+        of the uncertain weights rather than by nominal weight, and add
+        p_top and expected_rank columns. See monte_carlo_ranks.
+    top_k (int): Size of the top of the backlog for p_top
+    dedupe (bool): Merge the tasks that appear in several PBIs into one row;
+        see merge_duplicates. Combine with Task.jira_session in fetch_ideas
+        so shared JIRA issues are also fetched only once.
+    seed (int): Seed of the Monte Carlo samples, for rankings that can be
+        reproduced (e.g. one cached by AnalysisCache)
+
+    Returns:
+    pd.DataFrame: One row per task, sorted by weight
+    """
+    from taskbacklog.store import BacklogStore
+
+    pbis = columns = None
+    if isinstance(fetch_ideas, BacklogStore):
+        columns = fetch_ideas.columns()
+        columnar = True
+    else:
+        with instrument.span('fetch'):
+            pbis = list(fetch_ideas())
+        if columnar or samples:
+            with instrument.span('columns'):
+                columns = task_columns(pbis)
+    with instrument.span('compute', columnar=columnar):
+        full = _sorted_frame(pbis, columns, columnar, distance_std,
+                             correlated, samples, top_k, dedupe, seed)
+    instrument.count('rows', len(full))
+    return full
+
+
+def merge_duplicates(full, shares, own):
+    """Merge the rows of tasks that appear in more than one PBI
+
+    Tasks with the same URL (e.g. one JIRA subtask or merge request listed
+    under several PBIs) are the same work: doing it once delivers the value
+    it has for every PBI. Each group of duplicates becomes its first row,
+    with:
+      - weight: the sum of the shares of the duplicates in the value of
+        their PBIs, plus the value of the task itself once (the work, and
+        what you learn from it, happens once). Duplicates with different
+        value dimensions count the largest.
+      - age: the largest age
+      - p_top and expected_rank (if present): the best of the duplicates
+      - everything else (summary, estimate, Timebox): from the first row
+
+    Tasks without a URL are never merged.
+
+    Parameters:
+    full (pd.DataFrame): Result of analyze, in any order
+    shares, own (pd.Series): The two parts of the weight of every row of
+        full, indexed like full; see weight_part_columns
+
+    Returns:
+    pd.DataFrame: full without duplicates
+    """
+    urls = full.url
+    duplicates = full[urls.notna() & (urls != '')
+                      & urls.duplicated(keep=False)]
+    if duplicates.empty:
+        return full
+    full = full.copy()
+    dropped = []
+    for _, rows in duplicates.groupby('url', sort=False):
+        first = rows.index[0]
+        group_own = own.loc[rows.index]
+        best = max(group_own, key=lambda value: nominal_std(value)[0])
+        full.at[first, 'weight'] = sum(shares.loc[rows.index], best)
+        full.at[first, 'age'] = rows.age.max()
+        if 'p_top' in rows:
+            full.at[first, 'p_top'] = rows.p_top.max()
+            full.at[first, 'expected_rank'] = rows.expected_rank.min()
+        dropped.extend(rows.index[1:])
+    instrument.count('duplicates', len(dropped))
+    return full.drop(index=dropped)
+
+
+def compact_columns(full):
+    """The result of analyze as plain arrays
+
+    Cheap to store or to send between processes (a ufloat pickles with all
+    of its derivatives).
+
+    Returns:
+    dict: NumPy array by column name. estimate and weight become their
+        nominal values, plus estimate_std and weight_std; task holds the
+        row labels.
+    """
+    columns = {}
+    for name in full.columns:
+        if name in ('estimate', 'weight'):
+            values = np.array([nominal_std(x) for x in full[name]],
+                              dtype=float).reshape(-1, 2)
+            columns[name] = values[:, 0]
+            columns[name + '_std'] = values[:, 1]
+        else:
+            columns[name] = full[name].values
+    columns['task'] = full.index.values
+    return columns
+
+
+def _sorted_frame(pbis, columns, columnar, distance_std, correlated, samples,
+                  top_k, dedupe, seed):
+    """
+    Parameters:
+    pbis (list of PBI): Backlog; not needed when columnar
+    columns (pd.DataFrame): task_columns of the backlog; needed when
+        columnar or sampling
+    """
+    if columnar:
+        full, nominal, std, groups = _columnar_frame(columns)
+    else:
+        full, nominal, std, groups = _ufloat_frame(pbis)
+    if samples:
+        with instrument.span('monte_carlo', samples=samples):
+            ranks = monte_carlo_ranks(columns, samples, top_k, seed=seed)
+        full['p_top'] = ranks.p_top
+        full['expected_rank'] = ranks.expected_rank
+    if dedupe:
+        if columnar:
+            from uncertainties import ufloat
+
+            share, share_std, own, own_std = weight_part_columns(columns)
+            shares = pd.Series(
+                [ufloat(n, s) for n, s in zip(share, share_std)],
+                index=columns.index)
+            own = pd.Series([ufloat(n, s) for n, s in zip(own, own_std)],
+                            index=columns.index)
+        else:
+            own = pd.Series([
+                task.value_dimensions.total_value_hours(task.E) /
+                (task.E * task.wip_ratio) for pbi in pbis
+                for task in pbi.tasks
+            ])
+            shares = full.weight - own
+        full = merge_duplicates(full, shares, own)
+        weights = [nominal_std(weight) for weight in full.weight]
+        nominal = pd.DataFrame(
+            {
+                'weight': [weight[0] for weight in weights],
+                'estimate': nominal.estimate.loc[full.index]
+            },
+            index=full.index)
+        std = pd.DataFrame(
+            {
+                'weight': [weight[1] for weight in weights],
+                'estimate': std.estimate.loc[full.index]
+            },
+            index=full.index)
+
+    # Show a table with what you believe the weightiest item is (even if it's too large to do).
+    if samples:
+        full.sort_values(by='expected_rank', inplace=True)
+    else:
+        # By nominal weight: comparing ufloats is deprecated in uncertainties.
+        full = full.loc[nominal.weight.sort_values(ascending=False).index]
+    distance, distance_std_dev = calendar_distance(
+        nominal.estimate.loc[full.index],
+        std.estimate.loc[full.index] if distance_std else None,
+        groups.loc[full.index] if correlated else None)
+    full['calendar_distance_hours'] = distance
+    if distance_std:
+        full['calendar_distance_std'] = distance_std_dev
+    return full
+
+
+# Fixed color scales of the bars in the table, so that every page of a
+# paginated table (see style_analysis) is drawn on the same scale.
+bar_scales = {
+    # Schedule your day down to the hour; don't even consider tasks larger than 4 hours.
+    'Timebox': ('#d65f5f', 1.0, 4.0),
+    # Prefer older tasks (avoid focal work)
+    'age': ('green', 0.0, 42.0),
+    # Avoid tasks far in the future
+    'calendar_distance_hours': ('yellow', 0.0, 40.0),
+}
+
+
+def style_analysis(full, page=0, page_size=None):
+    """Styled table of the result of analyze
+
+    Styling and rendering HTML costs time (and notebook size) per row, so
+    only the rows of the requested page are styled.
+
+    Parameters:
+    full (pd.DataFrame): Result of analyze
+    page (int): Page to show, counting from 0 for the weightiest tasks
+    page_size (int): Rows per page; None shows the whole table
+
+    Returns:
+    pandas.io.formats.style.Styler
+    """
+
+    # https://stackoverflow.com/a/48481247/622049
+    def make_clickable(val):
+        # target _blank to open new window
+        return '<a target="_blank" href="{val}">{val}</a>'.format(val=val)
+
+    visible = full
+    if page_size is not None:
+        visible = full.iloc[page * page_size:(page + 1) * page_size]
+    styler = visible.style
+    styler.format({'url': make_clickable})
+
+    for column, (color, vmin, vmax) in bar_scales.items():
+        styler.bar(subset=column, color=color, vmin=vmin, vmax=vmax)
+
+    def highlight_empty(url_cell):
+        return [
+            'background-color: #d65f5f' if v == "" else '' for v in url_cell
+        ]
+
+    styler.apply(func=highlight_empty, subset="url")
+    if len(visible) < len(full):
+        first = page * page_size
+        styler.set_caption('Tasks {} to {} of {}'.format(
+            first + 1, first + len(visible), len(full)))
+    return styler
+
+
+def plot_analysis(full, max_points=500, top_k=20):
+    """Plot the result of analyze and display it as an image
+
+    See render_plot.
+
+    Returns:
+    bytes: PNG image
+    """
+    from IPython.core.display import display, Image
+
+    image = render_plot(full, max_points, top_k)
+    display(Image(data=image, format='png'))
+    return image
+
+
+def render_plot(full, max_points=500, top_k=20):
+    """Plot the result of analyze, without displaying it
+
+    Backlogs with more than max_points tasks are drawn as a density (hexbin)
+    plot, with error bars and labels only on the top_k weightiest tasks.
+    Rendered images are cached by their data, so plotting an unchanged
+    backlog again costs only a hash.
+
+    Parameters:
+    full (pd.DataFrame): Result of analyze
+    max_points (int): Largest backlog plotted point by point
+    top_k (int): Tasks labeled on a density plot
+
+    Returns:
+    bytes: PNG image
+    """
+    import hashlib
+
+    nominal, std = _nominal_std_frames(full)
+
+    digest = hashlib.sha1(repr((max_points, top_k, list(
+        full.index))).encode('utf-8'))
+    for frame in (nominal, std):
+        digest.update(frame.values.astype(float).tobytes())
+    key = digest.hexdigest()
+    with _images_lock:
+        image = _images.get(key)
+        if image is not None:
+            _images.move_to_end(key)
+            return image
+    # Render without the lock; e.g. the background analysis of
+    # schedule_day_async plots while the prompt thread may look up another.
+    with instrument.span('plot', rows=len(full)):
+        image = _plot(nominal, std, max_points, top_k)
+    with _images_lock:
+        _images[key] = image
+        _images.move_to_end(key)
+        while len(_images) > _max_images:
+            _images.popitem(last=False)
+    return image
+
+
+# Recently rendered plots (PNG) by digest of their data, least recently used
+# first
+_images = collections.OrderedDict()
+_images_lock = threading.Lock()
+_max_images = 16
+
+
+def perform_analysis(fetch_ideas, page_size=None, **kwargs):
+    """Plot and tabulate the tasks of every PBI, weightiest first
+
+    Parameters:
+    fetch_ideas (callable): Returns the PBIs
+    page_size (int): Show only this many of the weightiest tasks in the
+        table; None shows all of them. See also show_page.
+    kwargs: Options of analyze
+
+    Returns:
+    pd.DataFrame: One row per task, sorted by weight
+    """
+    from IPython.core.display import display
+
+    full = analyze(fetch_ideas, **kwargs)
+    plot_analysis(full)
+    with instrument.span('render'):
+        display(style_analysis(full, page_size=page_size))
+    return full
+
+
+def show_page(full, page, page_size=50):
+    """Display another page of the table of perform_analysis
+
+    Parameters:
+    full (pd.DataFrame): Result of perform_analysis (or analyze)
+    page (int): Page to show, counting from 0 for the weightiest tasks
+    page_size (int): Rows per page
+    """
+    from IPython.core.display import display
+    display(style_analysis(full, page=page, page_size=page_size))
+
+
+def backlog_fingerprint(pbis, *extra):
+    """Digest of everything in the PBIs that the analysis reads
+
+    Parameters:
+    pbis (list of PBI): Backlog
+    extra: Anything else the result depends on (e.g. analysis options)
+
+    Returns:
+    string: Hex digest; equal for backlogs that analyze the same way
+    """
+    import hashlib
+
+    digest = hashlib.sha1()
+    # Ages change at midnight.
+    digest.update(repr((date.today(), extra)).encode('utf-8'))
+    # Tasks sharing value dimensions, by order of appearance rather than by
+    # id, so equal backlogs built separately (e.g. loaded from a snapshot)
+    # have equal digests.
+    groups = {}
+    for pbi in pbis:
+        digest.update(
+            repr((nominal_std(pbi.V), pbi.creation_date)).encode('utf-8'))
+        for task in pbi.tasks:
+            vd = task.value_dimensions
+            digest.update(
+                repr((task.summary, task.url, nominal_std(task.E),
+                      task.wip_ratio, groups.setdefault(id(vd), len(groups)),
+                      nominal_std(vd.learning_ratio),
+                      nominal_std(vd.other_hours))).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class AnalysisCache():
+    """Reuse the last analysis while the backlog hasn't changed
+
+    Keeps the table, plot and styled HTML of the last perform_analysis call.
+    A later call with a backlog of the same fingerprint (see
+    backlog_fingerprint), within the time to live, shows those again instead
+    of recomputing them. fetch_ideas still runs every time; make it cheap
+    with Task.use_jira_cache.
+
+    With a snapshot file, every analysis is also saved to disk, and the
+    first call after a restart (e.g. reopening the notebook) loads it instead
+    of calling fetch_ideas, as long as it is within the time to live and
+    fetch_ideas has the same code; see taskbacklog.snapshot.
+    """
+    def __init__(self, ttl=None, snapshot=None):
+        """
+        Parameters:
+        ttl (datetime.timedelta): Recompute anyway after this long; defaults
+            to 30 minutes
+        snapshot (string): Path of the snapshot file; no snapshot by default
+        """
+        from datetime import timedelta
+        self.ttl = ttl if ttl is not None else timedelta(minutes=30)
+        self.snapshot = snapshot
+        self.invalidate()
+
+    def invalidate(self):
+        """Recompute on the next call, whatever the fingerprint"""
+        self.fingerprint = None
+        self.computed = None
+        self.full = None
+        self.image = None
+        self.html = None
+        self.pbis = None
+        self._index = None
+
+    @property
+    def index(self):
+        """taskbacklog.index.BacklogIndex of the last analysis, built on
+        first use"""
+        from taskbacklog.index import BacklogIndex
+
+        if self._index is None and self.full is not None:
+            self._index = BacklogIndex(self.full)
+        return self._index
+
+    def perform_analysis(self, fetch_ideas, page_size=None, **kwargs):
+        """Like taskbacklog.analysis.perform_analysis, but cached"""
+        self.prepare(fetch_ideas, page_size=page_size, **kwargs)
+        return self.show()
+
+    def prepare(self, fetch_ideas, page_size=None, **kwargs):
+        """Fetch the backlog and bring the analysis up to date, without
+        displaying anything (e.g. in the background; see show)
+
+        Parameters: As perform_analysis
+
+        Returns:
+        bool: Whether the analysis was recomputed
+        """
+        from datetime import datetime
+
+        from taskbacklog import snapshot
+
+        now = datetime.now()
+        if self.snapshot is not None:
+            source = snapshot.source_fingerprint(fetch_ideas, page_size,
+                                                 sorted(kwargs.items()))
+            if self.full is None:
+                with instrument.span('snapshot.load'):
+                    loaded = snapshot.load_snapshot(self.snapshot, source)
+                # Ages in the table change at midnight.
+                if (loaded is not None
+                        and loaded['computed'].date() == now.date()
+                        and now - loaded['computed'] <= self.ttl):
+                    instrument.count('analysis_cache.snapshot_hits')
+                    self.full = loaded['full']
+                    self.image = loaded['image']
+                    self.html = loaded['html']
+                    self.pbis = loaded['pbis']
+                    self._index = None
+                    # Later calls compare their backlog with the loaded one.
+                    self.fingerprint = backlog_fingerprint(
+                        self.pbis, page_size, sorted(kwargs.items()))
+                    self.computed = loaded['computed']
+                    return False
+
+        pbis = list(fetch_ideas())
+        fingerprint = backlog_fingerprint(pbis, page_size,
+                                          sorted(kwargs.items()))
+        if (fingerprint == self.fingerprint
+                and now - self.computed <= self.ttl):
+            instrument.count('analysis_cache.hits')
+            return False
+        full = analyze(lambda: pbis, **kwargs)
+        image = render_plot(full)
+        with instrument.span('render'):
+            html = style_analysis(full, page_size=page_size)._repr_html_()
+        self.full, self.image, self.html = full, image, html
+        self.pbis = pbis
+        self._index = None
+        self.fingerprint = fingerprint
+        self.computed = now
+        if self.snapshot is not None:
+            with instrument.span('snapshot.save'):
+                snapshot.save_snapshot(self.snapshot, pbis, full, image, html,
+                                       now, source)
+        return True
+
+    def show(self):
+        """Display the plot and table of the last analysis
+
+        Returns:
+        pd.DataFrame: A copy of the result of analyze
+        """
+        from IPython.core.display import display, HTML, Image
+
+        display(Image(data=self.image, format='png'))
+        display(HTML(self.html))
+        # Callers may modify their copy.
+        return self.full.copy()
+
+
+def _ufloat_frame(pbis):
+    pbis = list(pbis)
     # Convert raw data to a pandas data frame.
     full = pd.DataFrame([{
         'summary':
@@ -12,40 +787,85 @@ def perform_analysis(fetch_ideas):
         'estimate':
         task.E,
         'weight':
-        (pbi.V * task.E / pbi.E() + task.value_dimensions.total_value(
-            task.E * ureg.hours).to(ureg.hours).magnitude) /
+        (pbi.V * task.E / pbi.E() +
+         task.value_dimensions.total_value_hours(task.E)) /
         (task.E * task.wip_ratio),
         'url':
         task.url,
         'age': (date.today() - pbi.creation_date).days,
         'Timebox':
-        task.Timebox()
-    } for pbi in fetch_ideas() for task in pbi.tasks])
+        task.Timebox(),
+        'wip_ratio':
+        task.wip_ratio
+    } for pbi in pbis for task in pbi.tasks])
+
+    nominal, std = _nominal_std_frames(full)
+    groups = pd.Series([
+        id(task.value_dimensions) for pbi in pbis for task in pbi.tasks
+    ])
+    return full, nominal, std, groups
+
 
+def _nominal_std_frames(full):
+    """Nominal values and std devs of the weights and estimates of full
+
+    Estimates (and so weights) may be plain numbers, e.g. hours given
+    without uncertainty.
+    """
+    frames = {}
+    for name in ('weight', 'estimate'):
+        values = np.array([nominal_std(x) for x in full[name]],
+                          dtype=float).reshape(-1, 2)
+        frames[name] = values
+    nominal = pd.DataFrame(
+        {name: values[:, 0]
+         for name, values in frames.items()},
+        index=full.index)
+    std = pd.DataFrame(
+        {name: values[:, 1]
+         for name, values in frames.items()},
+        index=full.index)
+    return nominal, std
+
+
+def _plot(nominal, std, max_points, top_k):
     # Plot (V, E) with a label on every point with the summary of the Task. You should be able to quickly see how many
     # tasks or stories are small enough to start on (less than 4-8 hours). Hopefully you always have at least 3-4 stories
     # that are small enough you can pick from. Over time you should be able to see what kind of V/E ratio you typically have
     # on tasks you actually do.
-    nominal = pd.DataFrame({
-        'weight':
-        full['weight'].map(lambda w: w.nominal_value),
-        'estimate':
-        full['estimate'].map(lambda e: e.nominal_value)
-    })
+    import io
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
 
-    import matplotlib.pyplot as plt
-    plt.rcParams['figure.figsize'] = [12, 6]
+    # A figure of its own rather than one of pyplot: pyplot keeps global
+    # state and isn't thread-safe, and plots are also rendered in the
+    # background (see schedule_day_async). Nothing is shown, so it doesn't
+    # matter what backend (or display) there is; the image is all we need.
+    fig = Figure(figsize=[12, 6])
+    FigureCanvasAgg(fig)
 
     # https://stackoverflow.com/a/26000515/622049
     # https://matplotlib.org/3.1.1/api/_as_gen/matplotlib.pyplot.errorbar.html
     # https://matplotlib.org/gallery/lines_bars_and_markers/errorbar_limits_simple.html
     # https://stackoverflow.com/a/43990689/622049
-    fig, ax = plt.subplots()
+    ax = fig.subplots()
+    labeled = nominal
+    if len(nominal) > max_points:
+        # Thousands of overlapping error bars and labels are unreadable and
+        # slow to draw; show where the tasks are instead.
+        ax.hexbin(np.maximum(nominal.estimate.values, 0.1),
+                  nominal.weight.values,
+                  xscale='log',
+                  gridsize=60,
+                  mincnt=1,
+                  bins='log',
+                  cmap='Blues')
+        labeled = nominal.nlargest(top_k, 'weight')
     ax.errorbar(
-        nominal.estimate,
-        nominal.weight,
-        xerr=full['estimate'].map(lambda e: e.std_dev),
-        yerr=full['weight'].map(lambda w: w.std_dev),
+        labeled.estimate,
+        labeled.weight,
+        xerr=std.estimate.loc[labeled.index],
+        yerr=std.weight.loc[labeled.index],
         fmt='o')
     ax.set_xlim(left=0.1)
     ax.set_xscale("log")
@@ -54,9 +874,9 @@ def perform_analysis(fetch_ideas):
     ax.axvline(x=1, linestyle='--', color='orange')
     ax.axhline(y=1, linestyle='-', color='red')
 
-    for k, v in nominal.iterrows():
+    for k, v in labeled.iterrows():
         ax.annotate(
-            s=k,
+            k,
             xy=(v.estimate, v.weight),
             xytext=(5, 5),
             textcoords='offset points',
@@ -65,38 +885,6 @@ def perform_analysis(fetch_ideas):
             color='darkslategrey')
 
     ax.grid()
-    plt.show()
-
-    # https://stackoverflow.com/a/48481247/622049
-    def make_clickable(val):
-        # target _blank to open new window
-        return '<a target="_blank" href="{val}">{val}</a>'.format(val=val)
-
-    # Show a table with what you believe the weightiest item is (even if it's too large to do).
-    full.sort_values(by='weight', ascending=False, inplace=True)
-    full['calendar_distance_hours'] = full.estimate.cumsum()
-    full['calendar_distance_hours'] = full.calendar_distance_hours.apply(
-        lambda x: x.nominal_value)
-    styler = full.style
-    styler.format({'url': make_clickable})
-
-    # Schedule your day down to the hour; don't even consider tasks larger than 4 hours.
-    styler.bar(subset="Timebox", color='#d65f5f', vmin=1.0, vmax=4.0)
-
-    # Prefer older tasks (avoid focal work)
-    styler.bar(subset="age", color='green', vmin=0.0, vmax=42.0)
-
-    # Avoid tasks far in the future
-    styler.bar(
-        subset="calendar_distance_hours", color='yellow', vmin=0.0, vmax=40.0)
-
-    def highlight_empty(url_cell):
-        return [
-            'background-color: #d65f5f' if v == "" else '' for v in url_cell
-        ]
-
-    styler.apply(func=highlight_empty, subset="url")
-
-    display(styler)
-
-    return full
+    image = io.BytesIO()
+    fig.savefig(image, format='png')
+    return image.getvalue()
@@ -0,0 +1,54 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from taskbacklog import instrument
+
+
+def _analyze_backlog(name, fetch_ideas, kwargs):
+    from taskbacklog.analysis import analyze, compact_columns
+
+    with instrument.span('batch.backlog', backlog=name):
+        return name, compact_columns(analyze(fetch_ideas, **kwargs))
+
+
+def analyze_backlogs(backlogs, max_workers=None, **kwargs):
+    """Analyze several backlogs at once, one process per backlog
+
+    Every worker fetches one backlog and runs analyze on it (nothing is
+    plotted or rendered). The results come back as plain columns and are
+    merged into one table, weightiest first across all backlogs.
+
+    Parameters:
+    backlogs (dict): fetch_ideas callable by name (e.g. of a person or a
+        team). The callables are sent to the workers, so they must be
+        picklable: module-level functions or functools.partial of them.
+    max_workers (int): Processes; defaults to the number of CPUs
+    kwargs: Options of taskbacklog.analysis.analyze; columnar=True scales
+        best
+
+    Returns:
+    pd.DataFrame: One row per task with the backlog it belongs to, its label
+        in the analysis of that backlog (task), and the columns of analyze.
+        estimate and weight are nominal values, with their std devs in
+        estimate_std and weight_std. calendar_distance_hours is still per
+        backlog: the work ahead of a task in its own backlog.
+    """
+    import pandas as pd
+
+    frames = []
+    with instrument.span('batch', backlogs=len(backlogs)):
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(_analyze_backlog, name, fetch_ideas, kwargs)
+                for name, fetch_ideas in backlogs.items()
+            ]
+            for future in futures:
+                name, columns = future.result()
+                frame = pd.DataFrame(columns)
+                frame.insert(0, 'backlog', name)
+                frames.append(frame)
+    if not frames:
+        return pd.DataFrame()
+    merged = pd.concat(frames, ignore_index=True)
+    # A stable sort keeps every backlog's own order among equal weights.
+    return merged.sort_values(by='weight', ascending=False,
+                              kind='mergesort').reset_index(drop=True)
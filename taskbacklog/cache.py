@@ -0,0 +1,164 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+
+class JiraCache():
+    """Local copy of JIRA issues, refreshed incrementally
+
+    Issues are stored as the raw JSON JIRA returned, keyed by issue key, with
+    the `updated` timestamp of each. A sync asks JIRA only for the cached
+    issues that changed since the previous sync; everything else is served
+    from disk, so importing tasks works offline once the cache is warm.
+
+    An issue moved between projects keeps answering to its old ID; the
+    cache remembers such aliases so the old ID is served from disk too.
+    """
+    def __init__(self, path=None):
+        """
+        Parameters:
+        path (string): SQLite file; defaults to a file in ~/.cache
+        """
+        if path is None:
+            path = os.path.expanduser('~/.cache/taskbacklog/jira.sqlite')
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        # One connection shared by every thread that imports tasks.
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS issues (
+                    key TEXT PRIMARY KEY,
+                    updated TEXT,
+                    raw TEXT NOT NULL)""")
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS aliases (
+                    alias TEXT PRIMARY KEY,
+                    key TEXT NOT NULL)""")
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    name TEXT PRIMARY KEY,
+                    value TEXT NOT NULL)""")
+
+    def _meta(self, name):
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT value FROM meta WHERE name = ?', (name, )).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name, value):
+        with self.lock, self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)',
+                (name, str(value)))
+
+    def keys(self):
+        with self.lock:
+            return [
+                key for key, in self.connection.execute(
+                    'SELECT key FROM issues ORDER BY key')
+            ]
+
+    def get(self, keys):
+        """Cached issues
+
+        Parameters:
+        keys (list of string): JIRA IDs, current or aliases
+
+        Returns:
+        dict: jira.resources.Issue by requested ID, for the IDs found in the
+            cache
+        """
+        from jira.resources import Issue
+
+        keys = list(keys)
+        aliases = dict(self._select('SELECT alias, key FROM aliases '
+                                    'WHERE alias IN ({})', keys))
+        stored = [aliases.get(key, key) for key in keys]
+        raws = dict(
+            self._select('SELECT key, raw FROM issues WHERE key IN ({})',
+                         list(set(stored))))
+        # Issues rebuilt from disk have no session; permalink() only needs
+        # the server.
+        options = {'server': self._meta('server')}
+        return {
+            key: Issue(options, None, raw=json.loads(raws[stored_key]))
+            for key, stored_key in zip(keys, stored) if stored_key in raws
+        }
+
+    def _select(self, query, keys):
+        rows = []
+        with self.lock:
+            # Stay below SQLite's limit on the number of bound parameters.
+            for begin in range(0, len(keys), 500):
+                chunk = keys[begin:begin + 500]
+                rows.extend(
+                    self.connection.execute(
+                        query.format(','.join('?' * len(chunk))), chunk))
+        return rows
+
+    def put(self, issues, server=None, aliases=None):
+        """Store (or replace) issues fetched from JIRA
+
+        Parameters:
+        issues (list of jira.resources.Issue): Issues with raw JSON
+        server (string): JIRA server the issues came from
+        aliases (dict): Current key by old JIRA ID, for issues requested by
+            an ID they no longer have
+        """
+        if server is not None:
+            self._set_meta('server', server)
+        # Issues stored before the first sync are as fresh as this moment.
+        if self._meta('last_sync') is None:
+            self._set_meta('last_sync', time.time())
+        with self.lock, self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO issues (key, updated, raw) '
+                'VALUES (?, ?, ?)',
+                [(issue.key, issue.raw['fields'].get('updated'),
+                  json.dumps(issue.raw)) for issue in issues])
+            if aliases:
+                self.connection.executemany(
+                    'INSERT OR REPLACE INTO aliases (alias, key) '
+                    'VALUES (?, ?)', aliases.items())
+
+    def sync(self, jira, fields, batch_size=100):
+        """Refresh the cached issues that changed since the last sync
+
+        Parameters:
+        jira (jira.JIRA): Client to query
+        fields (list of string): Fields to store for every issue; must
+            include 'updated'
+
+        Returns:
+        int: Number of issues refreshed
+        """
+        started = time.time()
+        last_sync = self._meta('last_sync')
+        keys = self.keys()
+        refreshed = 0
+        if last_sync is not None and keys:
+            # A relative JQL date sidesteps the difference between the local
+            # timezone and the timezone of the JIRA user; one extra minute
+            # covers clock skew and the rounding.
+            minutes = math.ceil((started - float(last_sync)) / 60.0) + 1
+            for begin in range(0, len(keys), batch_size):
+                jql = 'key in ({}) AND updated >= -{}m'.format(
+                    ','.join(keys[begin:begin + batch_size]), minutes)
+                start = 0
+                while True:
+                    page = jira.search_issues(jql,
+                                              startAt=start,
+                                              maxResults=batch_size,
+                                              fields=','.join(fields))
+                    self.put(page, server=jira._options['server'])
+                    refreshed += len(page)
+                    start += len(page)
+                    if not page or start >= page.total:
+                        break
+        self._set_meta('last_sync', started)
+        return refreshed
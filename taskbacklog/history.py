@@ -0,0 +1,172 @@
+from datetime import datetime
+import os
+
+# Columns of every snapshot, besides time and rank; see
+# taskbacklog.analysis.compact_columns.
+snapshot_columns = [
+    'task', 'summary', 'url', 'age', 'estimate', 'estimate_std', 'weight',
+    'weight_std', 'Timebox', 'calendar_distance_hours'
+]
+
+_file_time = '%Y-%m-%dT%H%M%S.%f'
+
+
+class BacklogHistory():
+    """Snapshots of the ranked backlog over time, for studying drift
+
+    Every snapshot is the result of one analysis, written as its own Arrow
+    IPC file named after the time it was taken. Reads memory-map the files
+    in the requested time range and touch only the requested columns, so
+    months of snapshots can be queried without loading them into RAM.
+
+    Usage:
+
+        history = BacklogHistory()
+        history.write(analysis_cache.perform_analysis(fetch_ideas))
+        history.trajectory('https://...')
+    """
+    def __init__(self, directory=None):
+        """
+        Parameters:
+        directory (string): Where snapshots go; defaults to a directory in
+            ~/.cache
+        """
+        if directory is None:
+            directory = os.path.expanduser('~/.cache/taskbacklog/history')
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+
+    def write(self, full, time=None):
+        """Append a snapshot
+
+        Parameters:
+        full (pd.DataFrame): Result of analyze (or of perform_analysis)
+        time (datetime): When the snapshot was taken; defaults to now
+
+        Returns:
+        string: Path of the snapshot
+        """
+        import numpy as np
+        import pandas as pd
+        import pyarrow as pa
+
+        from taskbacklog.analysis import compact_columns
+
+        time = time or datetime.now()
+        columns = compact_columns(full)
+        arrays = {
+            'time': pa.array(np.full(len(full), np.datetime64(time, 'us'))),
+            'rank': pa.array(np.arange(len(full), dtype='int32')),
+        }
+        for name in snapshot_columns:
+            values = columns.get(name)
+            if values is None:
+                arrays[name] = pa.nulls(len(full))
+            elif pd.api.types.is_string_dtype(values.dtype):
+                # Strings come in object arrays or (pandas 3) string arrays.
+                # Tasks without a URL have None (or ''); keep them as nulls.
+                arrays[name] = pa.array(
+                    [str(value) if value else None for value in values],
+                    type=pa.string())
+            else:
+                arrays[name] = pa.array(values)
+        table = pa.table(arrays)
+        path = self._path(time)
+        with pa.OSFile(path + '.tmp', 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        # Readers never see a partly written snapshot.
+        os.replace(path + '.tmp', path)
+        return path
+
+    def _path(self, time):
+        return os.path.join(self.directory,
+                            time.strftime(_file_time) + '.arrow')
+
+    def times(self, start=None, end=None):
+        """Times of the snapshots from start (inclusive) to end (exclusive)
+
+        Taken from the file names; no snapshot is opened.
+        """
+        times = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.arrow'):
+                continue
+            time = datetime.strptime(name[:-len('.arrow')], _file_time)
+            if (start is None or time >= start) and (end is None
+                                                     or time < end):
+                times.append(time)
+        return sorted(times)
+
+    def table(self, start=None, end=None, columns=None):
+        """Snapshots in a time range as one memory-mapped Arrow table
+
+        Parameters:
+        start, end (datetime): See times
+        columns (list of string): Columns to read; all by default
+
+        Returns:
+        pyarrow.Table: Rows of every snapshot, oldest first; None if there
+            are no snapshots in the range
+        """
+        import pyarrow as pa
+
+        tables = []
+        for time in self.times(start, end):
+            path = self._path(time)
+            # Zero copy: the table refers to pages of the mapped file, which
+            # are read from disk only as columns are accessed.
+            table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+            if columns is not None:
+                table = table.select(columns)
+            tables.append(table)
+        if not tables:
+            return None
+        return pa.concat_tables(tables)
+
+    def trajectory(self, url, start=None, end=None):
+        """How the analysis of one task changed over time
+
+        Parameters:
+        url (string): URL of the task
+        start, end (datetime): See times
+
+        Returns:
+        pd.DataFrame: One row per snapshot with the task, indexed by time;
+            None if there are no snapshots in the range
+        """
+        import pyarrow.compute as pc
+
+        table = self.table(start, end, [
+            'time', 'url', 'rank', 'weight', 'weight_std', 'estimate',
+            'estimate_std', 'age', 'Timebox', 'calendar_distance_hours'
+        ])
+        if table is None:
+            return None
+        found = table.filter(pc.equal(table['url'], url))
+        return found.drop(['url']).to_pandas().set_index('time')
+
+    def size_per_day(self, start=None, end=None):
+        """Tasks and hours in the backlog, from the last snapshot of each day
+
+        Returns:
+        pd.DataFrame: tasks and hours (sum of nominal estimates) by date
+        """
+        import pandas as pd
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        last = {}
+        for time in self.times(start, end):
+            last[time.date()] = time
+        rows = {}
+        for day, time in sorted(last.items()):
+            path = self._path(time)
+            table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+            rows[day] = {
+                'tasks': table.num_rows,
+                'hours': pc.sum(table['estimate']).as_py() or 0.0
+            }
+        return pd.DataFrame.from_dict(rows,
+                                      orient='index',
+                                      columns=['tasks', 'hours'])
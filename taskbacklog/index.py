@@ -0,0 +1,134 @@
+import numpy as np
+
+# Views offered by schedule_day, after the reminders it shows for a task.
+views = {
+    'small': dict(estimate_under=1),
+    'old': dict(age_over=14),
+    'new': dict(age_under=3),
+    'no_url': dict(has_url=False),
+    'report': dict(estimate_over=1, has_url=False),
+    'breakdown': dict(estimate_over=4),
+    'wip': dict(wip=True),
+}
+
+
+class BacklogIndex():
+    """Answers filters on the result of analyze without scanning it
+
+    Built once per analysis: nominal estimates and ages are kept sorted
+    (with the rank of every value), URL presence and WIP status as boolean
+    arrays. A threshold becomes a binary search plus a mask of the rows on
+    one side of it, and masks are cached, so compound filters over large
+    backlogs cost a few vectorized ANDs. Rows stay in the order of the
+    analysis, so every result is a ranked slice.
+    """
+    def __init__(self, full):
+        """
+        Parameters:
+        full (pd.DataFrame): Result of analyze
+        """
+        self.full = full
+        self.columns = {
+            'estimate':
+            np.array(
+                [getattr(e, 'nominal_value', e) for e in full.estimate],
+                dtype=float),
+            'age':
+            full.age.values.astype(float),
+        }
+        self.order = {
+            name: np.argsort(values, kind='stable')
+            for name, values in self.columns.items()
+        }
+        self.sorted = {
+            name: values[self.order[name]]
+            for name, values in self.columns.items()
+        }
+        urls = full.url.values
+        self.masks = {
+            ('has_url', True):
+            np.array([bool(url) for url in urls], dtype=bool),
+        }
+        self.masks['has_url', False] = ~self.masks['has_url', True]
+        if 'wip_ratio' in full:
+            # See Task.__init__; only WIP has a ratio other than 1.
+            self.masks['wip', True] = full.wip_ratio.values != 1.0
+            self.masks['wip', False] = ~self.masks['wip', True]
+
+    def _threshold(self, name, below, value):
+        """Rows with the column strictly below (or above) value"""
+        key = (name, below, value)
+        if key not in self.masks:
+            values = self.sorted[name]
+            if below:
+                rows = self.order[name][:np.searchsorted(values, value,
+                                                         'left')]
+            else:
+                rows = self.order[name][np.searchsorted(values, value,
+                                                        'right'):]
+            mask = np.zeros(len(values), dtype=bool)
+            mask[rows] = True
+            self.masks[key] = mask
+        return self.masks[key]
+
+    def mask(self,
+             estimate_under=None,
+             estimate_over=None,
+             age_under=None,
+             age_over=None,
+             has_url=None,
+             wip=None):
+        """Rows matching all of the given conditions
+
+        Parameters:
+        estimate_under, estimate_over (double): Nominal estimate strictly
+            below or above, in hours
+        age_under, age_over (int): Age strictly below or above, in days
+        has_url (bool): With or without a URL
+        wip (bool): Work in progress or not
+
+        Returns:
+        np.array of bool: One per row of the analysis
+        """
+        masks = []
+        for name, below, value in [('estimate', True, estimate_under),
+                                   ('estimate', False, estimate_over),
+                                   ('age', True, age_under),
+                                   ('age', False, age_over)]:
+            if value is not None:
+                masks.append(self._threshold(name, below, value))
+        for name, value in [('has_url', has_url), ('wip', wip)]:
+            if value is not None:
+                masks.append(self.masks[name, bool(value)])
+        if not masks:
+            return np.ones(len(self.full), dtype=bool)
+        if len(masks) == 1:
+            return masks[0]
+        return np.logical_and.reduce(masks)
+
+    def positions(self, limit=None, **conditions):
+        """Positions (ranks, from 0) of the matching rows, weightiest first
+
+        Parameters:
+        limit (int): Return at most this many
+        conditions: See mask
+        """
+        positions = np.flatnonzero(self.mask(**conditions))
+        return positions if limit is None else positions[:limit]
+
+    def count(self, **conditions):
+        return int(np.count_nonzero(self.mask(**conditions)))
+
+    def query(self, limit=None, **conditions):
+        """The matching rows of the analysis, weightiest first
+
+        Parameters: See positions
+
+        Returns:
+        pd.DataFrame: Rows of the analysis, with their labels
+        """
+        return self.full.iloc[self.positions(limit, **conditions)]
+
+    def view(self, name, limit=None):
+        """One of the predefined views, e.g. 'small'; see views"""
+        return self.query(limit, **views[name])
@@ -0,0 +1,76 @@
+"""Timing and counter hooks for the slow phases of a run
+
+Nothing is measured until a sink is set; until then span() and count() cost
+one global lookup. For example, to log every event as a line of JSON:
+
+    from taskbacklog import instrument
+    instrument.set_sink(instrument.json_lines(open('run.jsonl', 'a')))
+"""
+import contextlib
+import json
+import sys
+import time
+
+_sink = None
+
+# Reused by span() while instrumentation is off.
+_off = contextlib.nullcontext()
+
+
+def set_sink(sink):
+    """Send events to sink
+
+    Parameters:
+    sink (callable): Called with one dict per event; None turns
+        instrumentation off. Events have a type ('span' or 'count'), a name,
+        a time (epoch seconds) and either seconds (spans) or value (counts),
+        plus the attributes given where the event was recorded.
+    """
+    global _sink
+    _sink = sink
+
+
+def enabled():
+    """Whether events are recorded; check before computing costly attributes"""
+    return _sink is not None
+
+
+def json_lines(stream=None):
+    """A sink writing one JSON object per line to stream (default stderr)"""
+    def write(event):
+        (stream or sys.stderr).write(json.dumps(event, default=str) + '\n')
+
+    return write
+
+
+def span(name, **attributes):
+    """Context manager timing a phase, e.g. `with span('plot'):`"""
+    if _sink is None:
+        return _off
+    return _span(name, attributes)
+
+
+@contextlib.contextmanager
+def _span(name, attributes):
+    started = time.time()
+    begin = time.perf_counter()
+    try:
+        yield
+    finally:
+        _sink(
+            dict(attributes,
+                 type='span',
+                 name=name,
+                 time=started,
+                 seconds=time.perf_counter() - begin))
+
+
+def count(name, value=1, **attributes):
+    """Record a quantity, e.g. `count('jira.calls', issue='ABC-1')`"""
+    if _sink is not None:
+        _sink(
+            dict(attributes,
+                 type='count',
+                 name=name,
+                 time=time.time(),
+                 value=value))
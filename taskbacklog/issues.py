@@ -1,40 +1,225 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import date
+import collections
+import functools
+import json
 import os
 import re
+import threading
+import time
 
-# Read as much as possible from a shared location when you're working on a
-# team; put analysis in JIRA before your personal notes.
-from jira import JIRA
-
+from taskbacklog import instrument
 
 # You sometimes need to log in from your browser as well, or you get an
 # exception that mentions CAPTCHA_CHALLENGE:
 # https://community.atlassian.com/t5/Jira-questions/JIRA-Rest-Sevice-returns-403-Forbidden/qaq-p/506392
-def load_jira():
+def load_jira(server='https://ngmp.in.here.com'):
     import configparser
+    # Read as much as possible from a shared location when you're working on
+    # a team; put analysis in JIRA before your personal notes.
+    from jira import JIRA
     config = configparser.ConfigParser()
     config.read(os.path.expanduser('~/.jira.conf'))
     jira_cred = config['credentials']
     # https://jira.readthedocs.io/en/master/examples.html#cookie-based-authentication
-    return JIRA('https://ngmp.in.here.com',
-                auth=(jira_cred['username'], jira_cred['password']))
-
-
-# The V and E in tasks are encouraged to include uncertainties.
-from uncertainties import ufloat
-
+    #
+    # Requests retry (and back off) with with_retries; the client retrying
+    # on its own as well would multiply the attempts and the waits.
+    return JIRA(server,
+                auth=(jira_cred['username'], jira_cred['password']),
+                max_retries=0)
+
+
+class JiraPool():
+    """A few authenticated JIRA clients shared by worker threads
+
+    A JIRA client is not safe to use from several threads at once. Each
+    client in the pool keeps its own HTTP session (with keep-alive
+    connections), and a thread borrows one for the duration of a fetch.
+    Clients are only logged in when a thread needs one.
+    """
+    def __init__(self, size=4, connect=load_jira):
+        """
+        Parameters:
+        size (int): Maximum number of clients
+        connect (callable): Returns a new client; e.g. a lambda calling
+            load_jira for another JIRA instance. Clients should not retry
+            on their own (max_retries=0); see with_retries.
+        """
+        self.size = size
+        self.connect = connect
+        self.idle = []
+        self.created = 0
+        # Signals a client returned, or a place freed by a failed login.
+        self.condition = threading.Condition()
+
+    @contextmanager
+    def client(self):
+        with self.condition:
+            while not self.idle and self.created >= self.size:
+                self.condition.wait()
+            if self.idle:
+                jira = self.idle.pop()
+            else:
+                self.created += 1
+                jira = None
+        if jira is None:
+            try:
+                jira = self.connect()
+            except BaseException:
+                # A failed login (e.g. CAPTCHA_CHALLENGE) gives back its
+                # place; a thread waiting for a client tries to log in
+                # itself rather than wait forever.
+                with self.condition:
+                    self.created -= 1
+                    self.condition.notify()
+                raise
+        try:
+            yield jira
+        finally:
+            with self.condition:
+                self.idle.append(jira)
+                self.condition.notify()
+
+
+# Overloaded or rate-limited JIRA servers answer with these; anything else
+# (e.g. a missing issue) won't go away by asking again.
+retry_status_codes = {429, 500, 502, 503, 504}
+
+
+def _retry_after(value, default):
+    """Seconds to wait according to a Retry-After header
+
+    The header holds either seconds or an HTTP date.
+    """
+    from email.utils import parsedate_to_datetime
+    if value is None:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(),
+                   0.0)
+    except (TypeError, ValueError):
+        return default
+
+
+def with_retries(fetch, retries=5, backoff=1.0):
+    """Call fetch, backing off exponentially on transient JIRA errors
+
+    Parameters:
+    fetch (callable): Makes one JIRA request; retrying repeats all of it
+    retries (int): Maximum number of attempts
+    backoff (double): Seconds to wait after the first failure; doubled on
+        every further failure unless the server sends Retry-After.
+    """
+    from jira import JIRAError
+    for attempt in range(retries):
+        try:
+            return fetch()
+        except JIRAError as error:
+            if (error.status_code not in retry_status_codes
+                    or attempt + 1 == retries):
+                raise
+            delay = backoff * 2**attempt
+            if error.response is not None:
+                delay = _retry_after(
+                    error.response.headers.get('Retry-After'), delay)
+            instrument.count('jira.retries', status=error.status_code)
+            time.sleep(delay)
+
+
+# A worker thread of the concurrent constructors fetches with the client it
+# borrowed from the pool rather than with Task.jira.
+_local = threading.local()
+
+
+# The V and E in tasks are encouraged to include uncertainties (ufloat).
+#
 # Tasks should be defined with:
 # * E in time.
 # * V in either dollars or time. If in dollars, use the "count" unit:
 #   * https://github.com/hgrecco/pint/blob/master/pint/default_en.txt
 #   * https://pint.readthedocs.io/en/0.9/defining.html
 #   * https://github.com/hgrecco/pint
-import pint
-ureg = pint.UnitRegistry()
+#
+# Parsing the unit definitions is the slowest part of importing this module,
+# so the registry is only built on first use (e.g. `from taskbacklog.issues
+# import ureg`) and then shared. Newer versions of pint can also keep the
+# parsed definitions in a cache folder across processes.
+#
+# Quantities of different registries can't be combined, so threads (e.g. of
+# the concurrent constructors) must never build one each.
+_ureg = None
+_ureg_lock = threading.Lock()
+
+
+def get_ureg():
+    global _ureg
+    if _ureg is None:
+        with _ureg_lock:
+            if _ureg is None:
+                import pint
+                try:
+                    _ureg = pint.UnitRegistry(cache_folder=':auto:')
+                except TypeError:
+                    _ureg = pint.UnitRegistry()
+    return _ureg
+
+
+@functools.lru_cache(maxsize=None)
+def _hours_per(units):
+    ureg = get_ureg()
+    return ureg.Quantity(1.0, units).to(ureg.hours).magnitude
+
+
+def to_hours(duration):
+    """Magnitude of a duration in hours
+
+    Everything is stored in plain hours (floats or ufloats) so pint is only
+    involved once per quantity, at construction. The conversion factor of
+    every unit is computed once and reused.
+
+    Parameters:
+    duration (pint [time]): A duration; plain numbers (and ufloats) are
+        taken to be in hours already
+
+    Returns:
+    double or ufloat: Hours
+    """
+    if not hasattr(duration, 'units'):
+        return duration
+    return duration.magnitude * _hours_per(duration.units)
+
+
+def to_hours_list(durations):
+    """Magnitudes of many durations in hours
+
+    Parameters:
+    durations (list or pint [time]): A list of durations (see to_hours), or
+        one pint quantity holding a whole array of magnitudes
+
+    Returns:
+    list: Hours
+    """
+    if hasattr(durations, 'units'):
+        factor = _hours_per(durations.units)
+        return [magnitude * factor for magnitude in durations.magnitude]
+    return [to_hours(duration) for duration in durations]
+
+
+def __getattr__(name):
+    if name == 'ureg':
+        return get_ureg()
+    raise AttributeError("module {!r} has no attribute {!r}".format(
+        __name__, name))
 
 
 class ValueDimensions():
-    def __init__(self, learning_ratio, other=0.0 * ureg.hours):
+    def __init__(self, learning_ratio, other=None):
         """Construct from raw data
 
         Parameters:
@@ -43,20 +228,28 @@ class ValueDimensions():
             be regained before or after your current company; usually the time
             after will dominate this number.
         other (pint [time]): Other forms of value, converted to dimensions of
-        time
+        time; defaults to zero hours. Plain numbers are taken to be hours.
         """
         # Learning ratio: The ratio of the time you'll gain long-term from
         # learning relative to the time it takes to do the task. For dedicated
         # learning tasks (e.g. following a tuturial) you would hope this to be
         # greater than one.
         self.learning_ratio = learning_ratio
-        self.other = other
+        self.other_hours = 0.0 if other is None else to_hours(other)
+
+    @property
+    def other(self):
+        return self.other_hours * get_ureg().hours
+
+    @other.setter
+    def other(self, value):
+        self.other_hours = to_hours(value)
 
     @classmethod
     def from_components(cls,
                         learning_ratio,
-                        compensation=0.0 * ureg.hours,
-                        delay=0.0 * ureg.hours):
+                        compensation=None,
+                        delay=None):
         """Construct from delineated value components
 
         V is stored in units of hours; the "smart" constructor takes
@@ -68,13 +261,18 @@ class ValueDimensions():
         Parameters:
         learning_ratio (double): See above
         compensation (pint [time]): Dollar value of task, converted to
-            dimensions of time.
+            dimensions of time. Defaults to zero hours.
         delay (pint [time]): Dollar value of cost of delay, converted to
-            dimensions of time.
+            dimensions of time. Defaults to zero hours.
         """
         # TODO: Support converting dollars to hours once there are many V
         # measurements in dollars.
-        return ValueDimensions(learning_ratio, compensation + delay)
+        other = 0.0
+        if compensation is not None:
+            other += to_hours(compensation)
+        if delay is not None:
+            other += to_hours(delay)
+        return ValueDimensions(learning_ratio, other)
 
     def total_value(self, task_size):
         """Value with all dimensions considered
@@ -87,6 +285,17 @@ class ValueDimensions():
         """
         return self.learning_ratio * task_size + self.other
 
+    def total_value_hours(self, task_hours):
+        """Value with all dimensions considered, without units
+
+        Parameters:
+        task_hours (double): Size of task in hours
+
+        Returns:
+        double: Total value in hours
+        """
+        return self.learning_ratio * task_hours + self.other_hours
+
 
 class Issue():
     def __init__(self,
@@ -128,7 +337,7 @@ class PBI(Issue):
         # TODO: Move to ValueDimensions
         # By providing V without units we make analysis of tasks
         # easier (no nested uncertainties classes in pint classes).
-        self.V = V_units.to(ureg.hours).magnitude
+        self.V = to_hours(V_units)
 
         self.creation_date = creation_date
 
@@ -152,6 +361,66 @@ class PBI(Issue):
         return sum(task.E for task in self.tasks)
 
 
+def _count_fetched(issues, request):
+    if not instrument.enabled():
+        return
+    instrument.count('jira.calls', request=request)
+    for issue in issues:
+        instrument.count('jira.issues', issue=issue.key)
+        # The size of the JSON of the issue; the HTTP response isn't kept.
+        instrument.count('jira.bytes',
+                         len(json.dumps(issue.raw)),
+                         issue=issue.key)
+
+
+# Comments linking a merge request, e.g. "[a merge request|https://...]"
+merge_pattern = re.compile(r"\[a merge request.*\|(.*)\]")
+
+# Merge request (or None) of recently scanned comments, least recently used
+# first; see _comment_merge_request.
+_comment_merge_requests = collections.OrderedDict()
+_comment_merge_requests_lock = threading.Lock()
+_max_comment_merge_requests = 10000
+
+ignorable_status = {'Complete', 'Cancelled', 'Released'}
+wip_status = {'Developing', 'Submitted'}
+
+
+def _self_assigned(issue):
+    return (issue.fields.assignee is not None
+            and issue.fields.assignee.name == 'vandebun')
+
+
+def _comment_merge_request(comment):
+    """Merge request linked by a comment (raw JSON), or None
+
+    The URL of a comment (self) tells apart comments of different JIRA
+    instances with the same ID, and an edit changes updated; comments without
+    either are recognized by their body.
+    """
+    key = (comment.get('self'), comment['id'], comment.get('updated')
+           or comment['body'])
+    with _comment_merge_requests_lock:
+        if key in _comment_merge_requests:
+            _comment_merge_requests.move_to_end(key)
+            return _comment_merge_requests[key]
+    match = merge_pattern.search(comment['body'])
+    merge_request = match.group(1) if match else None
+    with _comment_merge_requests_lock:
+        _comment_merge_requests[key] = merge_request
+        while len(_comment_merge_requests) > _max_comment_merge_requests:
+            _comment_merge_requests.popitem(last=False)
+    return merge_request
+
+
+def _per_item(value, items):
+    """Repeat a shared constructor argument, or check a per-item list"""
+    if isinstance(value, list):
+        assert len(value) == len(items)
+        return value
+    return [value] * len(items)
+
+
 class Task(Issue):
     def __init__(self,
                  summary,
@@ -182,14 +451,159 @@ class Task(Issue):
         self.wip_ratio = wip_ratio
 
         # E is stored in units of hours; the "smart" constructor takes
-        # measurements in time and converts to the standard of hours.
+        # measurements in time and converts to the standard of hours (plain
+        # numbers are already hours).
         #
         # By providing E without units we make analysis of tasks
         # easier (no nested uncertainties classes in pint classes).
-        self.E = estimate.to(ureg.hours).magnitude
+        self.E = to_hours(estimate)
+
+    @classmethod
+    def from_estimates(cls, summaries, estimates, value_dimensions, **kwargs):
+        """Construct many Tasks, converting all estimates to hours at once
+
+        Parameters:
+        summaries (list of string): One summary per Task
+        estimates (list or pint [time]): See to_hours_list
+        value_dimensions: Either one ValueDimensions shared by every Task or a
+            list with one per Task
+        kwargs: Other constructor arguments; likewise shared or per Task
+
+        Returns:
+        list: Tasks
+        """
+        summaries = list(summaries)
+        hours = to_hours_list(estimates)
+        assert len(hours) == len(summaries)
+        value_dimensions = _per_item(value_dimensions, summaries)
+        kwargs = {
+            name: _per_item(value, summaries)
+            for name, value in kwargs.items()
+        }
+        return [
+            cls(summary=summary,
+                estimate=hours[i],
+                value_dimensions=value_dimensions[i],
+                **{name: values[i]
+                   for name, values in kwargs.items()})
+            for i, summary in enumerate(summaries)
+        ]
 
     jira = None
 
+    # Fields read when importing a JIRA issue as a Task or a story as a list of
+    # Tasks; the batch constructors request exactly the same data.
+    jira_fields = [
+        'assignee',
+        'created',
+        'description',
+        'reporter',
+        'status',
+        'summary',
+        'timeestimate',
+    ]
+    jira_story_fields = [
+        'subtasks',
+        'timeestimate',
+        'status',
+        'summary',
+        'created',
+        'description',
+    ]
+
+    # Keys per `key in (...)` query; also the page size of each search. JIRA
+    # caps maxResults (usually at 100) and long JQL strings get rejected.
+    jira_batch_size = 100
+
+    # Comments per request when paging through the comments of an issue.
+    jira_comment_page_size = 100
+
+    # Optional taskbacklog.cache.JiraCache; see use_jira_cache.
+    jira_cache = None
+
+    # Clients for the concurrent constructors; see JiraPool.
+    jira_pool = None
+
+    # Issues (and merge requests) fetched in the current jira_session, by
+    # JIRA ID and requested fields; None outside of a session.
+    jira_session_issues = None
+
+    @classmethod
+    @contextmanager
+    def jira_session(cls):
+        """Fetch every JIRA issue at most once while the block runs
+
+        PBIs often share a story, a subtask or a merge request. Within a
+        session, importing the same issue again (e.g. from another PBI)
+        reuses the issue fetched first rather than requesting it again:
+
+            with Task.jira_session():
+                pbis = fetch_ideas()
+
+        Issues are not refreshed within a session; keep sessions short (one
+        fetch_ideas call) and see use_jira_cache for reuse across sessions.
+        Sessions don't nest.
+        """
+        cls.jira_session_issues = {}
+        try:
+            yield cls.jira_session_issues
+        finally:
+            cls.jira_session_issues = None
+
+    @classmethod
+    def use_jira_cache(cls, path=None, sync=True):
+        """Serve JIRA issues from an on-disk cache from now on
+
+        Issues missing from the cache are fetched once and stored; cached
+        issues are only downloaded again when a sync finds them updated.
+
+        Parameters:
+        path (string): SQLite file; see JiraCache
+        sync (bool): Refresh the issues changed since the last sync first.
+            Pass False to work offline from whatever is cached.
+        """
+        from taskbacklog.cache import JiraCache
+        cls.jira_cache = JiraCache(path)
+        if sync:
+            if not cls.jira:
+                cls.jira = load_jira()
+            cls.jira_cache.sync(cls.jira, cls._jira_cache_fields())
+        return cls.jira_cache
+
+    @classmethod
+    def _jira_cache_fields(cls):
+        # One cached copy of an issue serves both from_jira and
+        # from_jira_story, and the comments of the issue.
+        return sorted(
+            set(cls.jira_fields) | set(cls.jira_story_fields)
+            | {'comment', 'updated'})
+
+    @classmethod
+    def _client(cls):
+        jira = getattr(_local, 'jira', None)
+        if jira is not None:
+            return jira
+        if not cls.jira:
+            cls.jira = load_jira()
+        return cls.jira
+
+    @classmethod
+    def _get_issue(cls, jid, fields):
+        session = cls.jira_session_issues
+        if session is not None and (jid, tuple(fields)) in session:
+            instrument.count('jira.session_hits', 1)
+            return session[jid, tuple(fields)]
+        if cls.jira_cache is not None:
+            return cls._search_jira([jid], fields)[jid]
+        with instrument.span('jira.issue', issue=jid):
+            jira = cls._client()
+            issue = with_retries(
+                lambda: jira.issue(jid, fields=','.join(fields)))
+        _count_fetched([issue], 'issue')
+        if session is not None:
+            session[jid, tuple(fields)] = issue
+        return issue
+
     @classmethod
     def from_jira_story(cls, jid, value_dimensions, estimate):
         """Construct a Task from a JIRA story
@@ -201,11 +615,7 @@ class Task(Issue):
         Parameters:
         jid (string): JIRA ID
         """
-        if not cls.jira:
-            cls.jira = load_jira()
-        issue = cls.jira.issue(
-            jid,
-            fields='subtasks,timeestimate,status,summary,created,description')
+        issue = cls._get_issue(jid, cls.jira_story_fields)
         # If the story doesn't have subtasks, import it as a task of its own.
         if not issue.fields.subtasks:
             return cls.from_jira(jid,
@@ -231,34 +641,330 @@ class Task(Issue):
         wip_ratio (double): See comments on the Task constructor. If the item
             is not WIP in JIRA, this parameter is reset to 1.0.
         """
+        # One request per ID either way, so the comments come along rather
+        # than in a request of their own; see _merge_requests.
+        issue = cls._get_issue(jid, cls.jira_fields + ['comment'])
+        return cls._from_jira_issue(issue, value_dimensions, notes, estimate)
+
+    @classmethod
+    def from_jira_batch(cls, jids, value_dimensions, notes=None,
+                        estimate=None):
+        """Construct Tasks for many JIRA IDs at once
+
+        Same result as calling from_jira on every ID, but the issues are
+        resolved with a few paged `key in (...)` searches rather than one
+        request per ID.
+
+        Parameters:
+        jids (list of string): JIRA IDs
+        value_dimensions, notes, estimate: As in from_jira; either one value
+            shared by every ID or a list with one value per ID.
 
-        fields = [
-            'assignee',
-            'comment',
-            'created',
-            'description',
-            'reporter',
-            'status',
-            'summary',
-            'timeestimate',
+        Returns:
+        list: One list of Tasks per JIRA ID, in the order of jids
+        """
+        jids = list(jids)
+        requests = list(
+            zip(jids, _per_item(value_dimensions, jids),
+                _per_item(notes, jids), _per_item(estimate, jids)))
+        return cls._from_jira_requests(requests)
+
+    @classmethod
+    def from_jira_story_batch(cls, jids, value_dimensions, estimate):
+        """Construct Tasks for many JIRA stories at once
+
+        Same result as calling from_jira_story on every ID: one batched
+        search resolves the stories, and one more resolves all of their
+        subtasks (and the stories without subtasks) together.
+
+        Parameters:
+        jids (list of string): JIRA IDs of stories
+        value_dimensions, estimate: As in from_jira_story; either one value
+            shared by every story or a list with one value per story.
+
+        Returns:
+        list: One list of Tasks per story, in the order of jids
+        """
+        jids = list(jids)
+        stories = cls._search_jira(jids, cls.jira_story_fields)
+        requests = []
+        counts = []
+        for jid, story_value_dimensions, story_estimate in zip(
+                jids, _per_item(value_dimensions, jids),
+                _per_item(estimate, jids)):
+            subtasks = stories[jid].fields.subtasks
+            if not subtasks:
+                requests.append((jid, story_value_dimensions, None,
+                                 story_estimate))
+            else:
+                share = story_estimate / float(len(subtasks))
+                requests.extend((task.key, story_value_dimensions, None, share)
+                                for task in subtasks)
+            counts.append(max(len(subtasks), 1))
+
+        task_lists = iter(cls._from_jira_requests(requests))
+        return [[
+            task for _ in range(count) for task in next(task_lists)
+        ] for count in counts]
+
+    @classmethod
+    def from_jira_concurrent(cls,
+                             jids,
+                             value_dimensions,
+                             notes=None,
+                             estimate=None,
+                             max_workers=4,
+                             pool=None):
+        """Construct Tasks for many JIRA IDs with parallel requests
+
+        Calls from_jira for every ID on a thread pool. Prefer
+        from_jira_batch; this is for IDs a single search can't resolve, e.g.
+        issues on another JIRA instance (pass a pool connecting there) or keys
+        you may not be permitted to see.
+
+        Parameters:
+        jids (list of string): JIRA IDs
+        value_dimensions, notes, estimate: As in from_jira_batch
+        max_workers (int): Maximum number of requests in flight
+        pool (JiraPool): Clients to use; defaults to Task.jira_pool
+
+        Returns:
+        list: One list of Tasks per JIRA ID, in the order of jids
+        """
+        jids = list(jids)
+        requests = zip(jids, _per_item(value_dimensions, jids),
+                       _per_item(notes, jids), _per_item(estimate, jids))
+        return cls._map_concurrent(cls.from_jira, requests, max_workers, pool)
+
+    @classmethod
+    def from_jira_story_concurrent(cls,
+                                   jids,
+                                   value_dimensions,
+                                   estimate,
+                                   max_workers=4,
+                                   pool=None):
+        """Construct Tasks for many JIRA stories with parallel requests
+
+        See from_jira_concurrent; calls from_jira_story for every ID.
+
+        Returns:
+        list: One list of Tasks per story, in the order of jids
+        """
+        jids = list(jids)
+        requests = zip(jids, _per_item(value_dimensions, jids),
+                       _per_item(estimate, jids))
+        return cls._map_concurrent(cls.from_jira_story, requests, max_workers,
+                                   pool)
+
+    @classmethod
+    def _map_concurrent(cls, construct, requests, max_workers, pool):
+        if pool is None:
+            if cls.jira_pool is None:
+                cls.jira_pool = JiraPool(size=max_workers)
+            pool = cls.jira_pool
+
+        def run(request):
+            with pool.client() as jira:
+                _local.jira = jira
+                try:
+                    # Every request retries on its own (see with_retries), so
+                    # a rejected request doesn't repeat the ones before it.
+                    return construct(*request)
+                finally:
+                    _local.jira = None
+
+        # map() yields results in the order of the requests, whatever order
+        # they complete in.
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(run, requests))
+
+    @classmethod
+    def _from_jira_requests(cls, requests):
+        """Resolve (jid, value_dimensions, notes, estimate) tuples in bulk"""
+        issues = cls._search_jira([jid for jid, _, _, _ in requests],
+                                  cls.jira_fields)
+        merge_requests = cls._merge_requests([
+            issue.key for issue in issues.values()
+            if issue.fields.status.name not in ignorable_status
+            and not _self_assigned(issue)
+        ])
+        return [
+            cls._from_jira_issue(issues[jid], value_dimensions, notes,
+                                 estimate,
+                                 merge_requests.get(issues[jid].key))
+            for jid, value_dimensions, notes, estimate in requests
         ]
-        if not cls.jira:
-            cls.jira = load_jira()
-        issue = cls.jira.issue(jid, fields=','.join(fields))
+
+    @classmethod
+    def _merge_requests(cls, jids):
+        """Merge requests linked in the comments of issues
+
+        The batch constructors request comments only here, for the issues
+        that need them, with the same batched searches as the issues
+        themselves.
+
+        Returns:
+        dict: List of merge request URLs by JIRA ID
+        """
+        if not jids:
+            return {}
+        return {
+            jid: cls._issue_merge_requests(issue)
+            for jid, issue in cls._search_jira(jids, ['comment']).items()
+        }
+
+    @classmethod
+    def _issue_merge_requests(cls, issue):
+        """Merge requests linked in the comments of an issue fetched with its
+        comments
+
+        JIRA returns the first page of the comments of an issue; the rest are
+        paged in with iter_comments, once: they are kept with the issue, so
+        the jira_session and the jira_cache serve them from then on.
+        """
+        comment = issue.raw['fields']['comment']
+        comments = comment['comments']
+        if comment.get('total', 0) > len(comments):
+            comments = comments + list(
+                cls.iter_comments(issue.key, start=len(comments)))
+            # One assignment, so threads sharing the issue (through a
+            # session) never see a partial list.
+            comment['comments'] = comments
+            comment['maxResults'] = len(comments)
+            # Only issues with every cached field go back into the cache.
+            if (cls.jira_cache is not None
+                    and 'updated' in issue.raw['fields']):
+                cls.jira_cache.put([issue])
+        links = [_comment_merge_request(comment) for comment in comments]
+        return [link for link in links if link]
+
+    @classmethod
+    def iter_comments(cls, jid, start=0):
+        """Stream the comments of an issue, one page per request
+
+        Parameters:
+        jid (string): JIRA ID
+        start (int): Index of the first comment
+
+        Returns:
+        generator: Comments as raw JSON (dicts with id and body)
+        """
+        jira = cls._client()
+        while True:
+            with instrument.span('jira.comments', issue=jid, startAt=start):
+                page = with_retries(lambda: jira._get_json(
+                    'issue/{}/comment'.format(jid),
+                    params={
+                        'startAt': start,
+                        'maxResults': cls.jira_comment_page_size
+                    }))
+            instrument.count('jira.calls', request='comments')
+            yield from page['comments']
+            start += len(page['comments'])
+            if not page['comments'] or start >= page['total']:
+                break
+
+    @classmethod
+    def _search_jira(cls, jids, fields):
+        """Fetch issues with paged `key in (...)` searches
+
+        Within a jira_session, only the issues not fetched before with the
+        same fields are requested.
+
+        Returns:
+        dict: JIRA issue by requested ID
+        """
+        jids = list(dict.fromkeys(jids))
+        session = cls.jira_session_issues
+        if session is not None:
+            shared = {
+                jid: session[jid, tuple(fields)]
+                for jid in jids if (jid, tuple(fields)) in session
+            }
+            instrument.count('jira.session_hits', len(shared))
+            if len(shared) < len(jids):
+                fetched = cls._fetch_jira(
+                    [jid for jid in jids if jid not in shared], fields)
+                session.update(
+                    ((jid, tuple(fields)), issue)
+                    for jid, issue in fetched.items())
+                shared.update(fetched)
+            return shared
+        return cls._fetch_jira(jids, fields)
+
+    @classmethod
+    def _fetch_jira(cls, jids, fields):
+        issues = {}
+        if cls.jira_cache is not None:
+            issues = cls.jira_cache.get(jids)
+            fields = cls._jira_cache_fields()
+            instrument.count('jira.cache_hits', len(issues))
+        missing = [jid for jid in jids if jid not in issues]
+        if not missing:
+            return issues
+
+        jira = cls._client()
+        fetched = []
+        for begin in range(0, len(missing), cls.jira_batch_size):
+            jql = 'key in ({})'.format(','.join(
+                missing[begin:begin + cls.jira_batch_size]))
+            start = 0
+            while True:
+                with instrument.span('jira.search', startAt=start):
+                    page = with_retries(lambda: jira.search_issues(
+                        jql,
+                        startAt=start,
+                        maxResults=cls.jira_batch_size,
+                        fields=','.join(fields)))
+                _count_fetched(page, 'search')
+                fetched.extend(page)
+                start += len(page)
+                if not page or start >= page.total:
+                    break
+        # Search results carry the current key of an issue; an ID from before
+        # a move between projects only resolves with a direct request.
+        issues.update((issue.key, issue) for issue in fetched)
+        for jid in missing:
+            if jid not in issues:
+                with instrument.span('jira.issue', issue=jid):
+                    issues[jid] = with_retries(
+                        lambda: jira.issue(jid, fields=','.join(fields)))
+                _count_fetched([issues[jid]], 'issue')
+                fetched.append(issues[jid])
+        if cls.jira_cache is not None:
+            cls.jira_cache.put(fetched,
+                               server=jira._options['server'],
+                               aliases={
+                                   jid: issues[jid].key
+                                   for jid in missing
+                                   if issues[jid].key != jid
+                               })
+        return issues
+
+    @classmethod
+    def _from_jira_issue(cls,
+                         issue,
+                         value_dimensions,
+                         notes,
+                         estimate,
+                         merge_requests=None):
+        """
+        Parameters:
+        merge_requests (list of string): URLs linked in the comments of the
+            issue, if already known; see _merge_requests
+        """
+        from uncertainties import ufloat
+
+        ureg = get_ureg()
         if issue.fields.timeestimate:
             estimate = issue.fields.timeestimate * ureg.seconds
         assert estimate is not None
 
-        ignorable_status = {'Complete', 'Cancelled', 'Released'}
         if issue.fields.status.name in ignorable_status:
             return []
 
-        self_assigned = False
-        if issue.fields.assignee is not None:
-            if issue.fields.assignee.name == 'vandebun':
-                self_assigned = True
+        self_assigned = _self_assigned(issue)
 
-        wip_status = {'Developing', 'Submitted'}
         wip_ratio = 1.0
         if issue.fields.status.name in wip_status:
             wip_ratio = 0.7
@@ -269,12 +975,13 @@ class Task(Issue):
         task_list = []
 
         if not self_assigned:
-            merge_pattern = re.compile(r"\[a merge request.*\|(.*)\]")
-            merge_requests = [
-                merge_pattern.search(comment.body).group(1)
-                for comment in issue.fields.comment.comments
-                if merge_pattern.search(comment.body)
-            ]
+            # Comments are only needed (and fetched) for other people's work.
+            if merge_requests is None:
+                if 'comment' in issue.raw['fields']:
+                    merge_requests = cls._issue_merge_requests(issue)
+                else:
+                    merge_requests = cls._merge_requests(
+                        [issue.key])[issue.key]
             for merge_request in merge_requests:
                 task_list.extend([
                     Task(summary=issue.fields.summary,
@@ -301,5 +1008,7 @@ class Task(Issue):
         return task_list
 
     def Timebox(self):
-        # Default to two standard deviations (95% chance of completion)
-        return self.E.nominal_value + 2 * self.E.std_dev
+        # Default to two standard deviations (95% chance of completion); an
+        # estimate without uncertainty is its own Timebox.
+        return (getattr(self.E, 'nominal_value', self.E) +
+                2 * getattr(self.E, 'std_dev', 0.0))
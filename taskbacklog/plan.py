@@ -0,0 +1,118 @@
+import numpy as np
+
+from taskbacklog import instrument
+
+
+def _knapsack(sizes, values, capacity):
+    """Indices of the items of largest total value with total size within
+    capacity (0/1 knapsack by dynamic programming)
+
+    Parameters:
+    sizes (np.array of int): Size of every item, in units
+    values (np.array of double): Value of every item
+    capacity (int): Units available
+
+    Returns:
+    list of int: Chosen items, in the order given
+    """
+    # best[c] is the largest value that fits in c units with the items so
+    # far; taken[i, c] whether item i is part of that choice.
+    best = np.zeros(capacity + 1)
+    taken = np.zeros((len(sizes), capacity + 1), dtype=bool)
+    for i, (size, value) in enumerate(zip(sizes, values)):
+        if size > capacity:
+            continue
+        candidate = best[:capacity + 1 - size] + value
+        better = candidate > best[size:]
+        taken[i, size:] = better
+        best[size:] = np.where(better, candidate, best[size:])
+    chosen = []
+    c = capacity
+    for i in range(len(sizes) - 1, -1, -1):
+        if taken[i, c]:
+            chosen.append(i)
+            c -= sizes[i]
+    return chosen[::-1]
+
+
+def _contenders(sizes, values, capacity):
+    """Indices of the only items an optimal choice needs to consider
+
+    At most capacity // size items of one size fit, and an optimal choice
+    may as well take the most valuable ones of that size. Sizes are small
+    integers (a Timebox in steps of the resolution), so this leaves a few
+    dozen items however large the backlog.
+    """
+    order = np.lexsort((-values, sizes))
+    sorted_sizes = sizes[order]
+    first = np.searchsorted(sorted_sizes, sorted_sizes)
+    rank = np.arange(len(order)) - first
+    return np.sort(order[rank < capacity // sorted_sizes])
+
+
+def plan_days(full,
+              hours,
+              days=1,
+              resolution=0.25,
+              max_timebox=4.0,
+              min_age=3):
+    """Choose the most valuable tasks that fit in your free hours
+
+    Tasks take their Timebox (see Task.Timebox) and are worth their weight
+    times their estimate (the value they deliver). Following the advice of
+    schedule_day, tasks with a Timebox over max_timebox (break them down
+    first) and tasks younger than min_age days (avoid recently created
+    stories) are left out. Every day gets the set of remaining tasks of
+    largest total value that fits in its hours; the next day is planned
+    from what's left.
+
+    Parameters:
+    full (pd.DataFrame): Result of analyze
+    hours (double or list of double): Free hours per day, or one value per
+        day (a list or an array)
+    days (int): Days to plan, when hours is a single value
+    resolution (double): Hours are rounded to this step; Timeboxes round
+        up, so a plan never overfills a day
+    max_timebox (double): Largest Timebox to schedule, in hours
+    min_age (int): Youngest task to schedule, in days
+
+    Returns:
+    pd.DataFrame: The planned rows of full, by day (counting from 0) and
+        then in the order of full, with their day and the hours planned on
+        that day up to and including the task (day_hours)
+    """
+    import pandas as pd
+
+    # A list or array gives the hours of every day.
+    if np.ndim(hours) == 0:
+        hours = [hours] * days
+    candidates = full[(full.Timebox <= max_timebox) & (full.age >= min_age)]
+    # ufloats, or plain numbers (e.g. from analyze_backlogs)
+    weight = np.array(
+        [getattr(w, 'nominal_value', w) for w in candidates.weight],
+        dtype=float)
+    estimate = np.array(
+        [getattr(e, 'nominal_value', e) for e in candidates.estimate],
+        dtype=float)
+    value = weight * estimate
+    keep = value > 0
+    candidates = candidates[keep]
+    value = value[keep]
+    sizes = np.maximum(
+        np.ceil(candidates.Timebox.values / resolution - 1e-9).astype(int), 1)
+
+    plans = []
+    remaining = np.arange(len(candidates))
+    with instrument.span('plan', tasks=len(candidates), days=len(hours)):
+        for day, day_hours in enumerate(hours):
+            capacity = int(np.floor(day_hours / resolution + 1e-9))
+            fits = remaining[sizes[remaining] <= capacity]
+            fits = fits[_contenders(sizes[fits], value[fits], capacity)]
+            chosen = fits[_knapsack(sizes[fits], value[fits], capacity)]
+            plan = candidates.iloc[chosen].copy()
+            plan['day'] = day
+            plans.append(plan)
+            remaining = np.setdiff1d(remaining, chosen)
+    planned = pd.concat(plans)
+    planned['day_hours'] = planned.groupby('day').Timebox.cumsum()
+    return planned
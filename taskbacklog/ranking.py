@@ -0,0 +1,278 @@
+import itertools
+import random
+
+from taskbacklog.analysis import nominal_std
+
+# Columns of analyze that depend on the whole backlog and would go stale
+# with the first update; to_frame computes calendar_distance_hours again.
+_derived_columns = {
+    'calendar_distance_hours', 'calendar_distance_std', 'p_top',
+    'expected_rank'
+}
+
+
+class _Node():
+    __slots__ = ('key', 'order', 'priority', 'row', 'estimate', 'left',
+                 'right', 'size', 'hours')
+
+    def __init__(self, key, order, priority, row):
+        self.key = key
+        self.order = order
+        self.priority = priority
+        self.row = row
+        self.estimate = nominal_std(row['estimate'])[0]
+        self.left = None
+        self.right = None
+        self.size = 1
+        self.hours = self.estimate
+
+
+def _update(node):
+    node.size = 1
+    node.hours = node.estimate
+    for child in (node.left, node.right):
+        if child is not None:
+            node.size += child.size
+            node.hours += child.hours
+
+
+def _split(node, order):
+    """Split a treap into the nodes before order and the rest"""
+    if node is None:
+        return None, None
+    if node.order < order:
+        node.right, rest = _split(node.right, order)
+        _update(node)
+        return node, rest
+    before, node.left = _split(node.left, order)
+    _update(node)
+    return before, node
+
+
+def _merge(left, right):
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+
+class RankedBacklog():
+    """The result of analyze, kept sorted under single-task updates
+
+    Tasks are held in a treap (a randomized balanced search tree) ordered by
+    descending nominal weight. Every node also tracks the size and the total
+    nominal estimate of its subtree, so inserting, removing or re-estimating
+    one task, and looking up its rank or calendar distance, take O(log n)
+    rather than a full sort and cumsum of the backlog.
+
+    The weight of a task depends on the estimates of every task of its PBI.
+    Given the PBIs, the backlog keeps their inputs, and re-estimating or
+    removing a task also re-weights (and re-ranks) the other tasks of its
+    PBI, as a new analysis would.
+    """
+    def __init__(self, seed=None):
+        self.root = None
+        self.nodes = {}
+        self.random = random.Random(seed)
+        # Breaks ties between equal weights by insertion order.
+        self.counter = itertools.count()
+        # PBI (value and keys of its tasks) by key of a task; tasks inserted
+        # on their own have none.
+        self.pbis = {}
+        # Task (value dimensions and WIP ratio) by key
+        self.tasks = {}
+
+    @classmethod
+    def from_frame(cls, full, pbis=None, seed=None):
+        """
+        Parameters:
+        full (pd.DataFrame): Result of analyze; its index labels become the
+            keys of the tasks
+        pbis (list of PBI): The backlog full was computed from, to keep the
+            weights of the other tasks of a PBI up to date on every update.
+            The analysis must have one row per task (no dedupe): its labels
+            number the tasks of the PBIs in order.
+        """
+        backlog = cls(seed=seed)
+        columns = [
+            column for column in full.columns
+            if column not in _derived_columns
+        ]
+        for key, row in zip(full.index,
+                            full[columns].to_dict(orient='records')):
+            backlog.insert(key, row)
+        if pbis is not None:
+            tasks = [(pbi, task) for pbi in pbis for task in pbi.tasks]
+            if sorted(full.index) != list(range(len(tasks))):
+                raise ValueError(
+                    'Expected one row per task of the PBIs, labeled in order')
+            keys = iter(range(len(tasks)))
+            for pbi in pbis:
+                inputs = {
+                    'V': pbi.V,
+                    'keys': [next(keys) for _ in pbi.tasks]
+                }
+                for key, task in zip(inputs['keys'], pbi.tasks):
+                    backlog.pbis[key] = inputs
+                    backlog.tasks[key] = task
+        return backlog
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, key):
+        return key in self.nodes
+
+    def __iter__(self):
+        """Keys, weightiest first"""
+        for node in self._nodes():
+            yield node.key
+
+    def _nodes(self):
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node
+            node = node.right
+
+    def insert(self, key, row):
+        """Add a task
+
+        Parameters:
+        key: Unique label of the task (e.g. its index in the analysis)
+        row (dict): Columns of the task in the analysis; at least estimate
+            and weight
+        """
+        self._insert(key, row, next(self.counter))
+
+    def _insert(self, key, row, tie):
+        assert key not in self.nodes
+        order = (-nominal_std(row['weight'])[0], tie)
+        node = _Node(key, order, self.random.random(), dict(row))
+        self.nodes[key] = node
+        before, after = _split(self.root, order)
+        self.root = _merge(_merge(before, node), after)
+
+    def _remove(self, key):
+        """Remove a task; returns its row and its place among equal weights"""
+        node = self.nodes.pop(key)
+        before, rest = _split(self.root, node.order)
+        # Orders are unique, so the node is the first of the rest.
+        _, after = _split(rest, (node.order[0], node.order[1] + 1))
+        self.root = _merge(before, after)
+        return node.row, node.order[1]
+
+    def remove(self, key):
+        """Remove a task (e.g. one you completed) and return its row
+
+        The other tasks of its PBI share its value from now on.
+        """
+        row, _ = self._remove(key)
+        self.tasks.pop(key, None)
+        pbi = self.pbis.pop(key, None)
+        if pbi is not None:
+            pbi['keys'].remove(key)
+            self._reweigh(pbi['keys'])
+        return row
+
+    def reestimate(self, key, estimate, weight=None):
+        """Replace the estimate (and so the weight) of a task
+
+        Parameters:
+        estimate (double or ufloat): Hours
+        weight (double or ufloat): New weight; computed (along with the new
+            weights of the other tasks of the PBI) when the backlog knows
+            the PBI of the task, see from_frame
+        """
+        if weight is None and key not in self.pbis:
+            raise ValueError(
+                'The PBI of {!r} is unknown; pass its weight'.format(key))
+        row, tie = self._remove(key)
+        row['estimate'] = estimate
+        if 'Timebox' in row:
+            # See Task.Timebox
+            nominal, std = nominal_std(estimate)
+            row['Timebox'] = nominal + 2 * std
+        if weight is not None:
+            row['weight'] = weight
+        self._insert(key, row, tie)
+        if weight is None:
+            self._reweigh(self.pbis[key]['keys'])
+
+    def _reweigh(self, keys):
+        """Weigh the tasks of one PBI again, with their current estimates
+
+        See taskbacklog.analysis._ufloat_frame
+        """
+        if not keys:
+            return
+        pbi = self.pbis[keys[0]]
+        E_pbi = sum(self.nodes[key].row['estimate'] for key in keys)
+        for key in keys:
+            row, tie = self._remove(key)
+            task = self.tasks[key]
+            E = row['estimate']
+            row['weight'] = (
+                pbi['V'] * E / E_pbi +
+                task.value_dimensions.total_value_hours(E)) / (E *
+                                                               task.wip_ratio)
+            self._insert(key, row, tie)
+
+    def _prefix(self, key):
+        """Number of tasks and hours strictly before a task"""
+        order = self.nodes[key].order
+        count = 0
+        hours = 0.0
+        node = self.root
+        while node is not None:
+            if node.order < order:
+                count += 1
+                hours += node.estimate
+                if node.left is not None:
+                    count += node.left.size
+                    hours += node.left.hours
+                node = node.right
+            elif node.order > order:
+                node = node.left
+            else:
+                if node.left is not None:
+                    count += node.left.size
+                    hours += node.left.hours
+                return count, hours
+        raise KeyError(key)
+
+    def rank(self, key):
+        """Position of a task, counting from 0 for the weightiest"""
+        return self._prefix(key)[0]
+
+    def calendar_distance(self, key):
+        """Hours of work up to and including a task"""
+        return self._prefix(key)[1] + self.nodes[key].estimate
+
+    def head(self, n):
+        """Keys of the n weightiest tasks"""
+        return list(itertools.islice(self, n))
+
+    def to_frame(self):
+        """Same columns as analyze, weightiest first"""
+        import pandas as pd
+
+        keys = []
+        rows = []
+        hours = 0.0
+        for node in self._nodes():
+            hours += node.estimate
+            keys.append(node.key)
+            rows.append(dict(node.row, calendar_distance_hours=hours))
+        return pd.DataFrame(rows, index=keys)
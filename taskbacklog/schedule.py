@@ -1,10 +1,10 @@
 from datetime import datetime, timedelta, timezone
 from threading import Timer
-from IPython.display import display, Math, Latex, Markdown
-import pandas as pd
+import functools
 import os, time
 
-from taskbacklog.analysis import perform_analysis
+# IPython, pandas and the analysis (numpy, matplotlib) are imported where
+# they are first needed, so that importing this module stays fast.
 
 class System():
     def __init__(self, name, tips):
@@ -58,8 +58,17 @@ Schedule the item to your day. See:
   * See [Process: Schedule day (home)](https://docs.google.com/document/d/1iPrL-jZtRQC2e3C70vFTNahcJa_H9IBMWOByTciPkHk/edit) (i.e. use a timer).
 """)}
 
-option_table = pd.DataFrame(
-    {systems[system].name: pd.Series(dict({'Key': system})) for system in systems})
+@functools.lru_cache(maxsize=None)
+def get_option_table():
+    import pandas as pd
+    return pd.DataFrame(
+        {systems[system].name: pd.Series(dict({'Key': system})) for system in systems})
+
+def __getattr__(name):
+    if name == 'option_table':
+        return get_option_table()
+    raise AttributeError("module {!r} has no attribute {!r}".format(
+        __name__, name))
 
 def prompt_for_integer(prompt_string):
     expect_integer = None
@@ -78,6 +87,7 @@ os.environ['TZ'] = 'America/Chicago'
 time.tzset()
 
 def start_timer(timebox, timeout_string):
+    from IPython.display import display, Markdown
     cutoff = (datetime.now() + timebox).strftime('%Y-%m-%d %H:%M')
     display(Markdown(f"""
 - Timebox: {timebox}
@@ -91,41 +101,33 @@ def start_timer(timebox, timeout_string):
     t.start()
     return t
 
-def schedule_day(fetch_ideas):
-    # Skim online task systems (starting with the most interruptive)
-    while True:
-        display(option_table)
-        sk = input("Enter system selection (empty to stop): ")
-        if sk not in systems:
-            break
+# Rows of the backlog table shown in schedule_day; you'll pick from the top.
+# Use taskbacklog.analysis.show_page to see more.
+table_page_size = 50
 
-        system = systems[sk]
-        display(Markdown(system.tips))
+def task_advice(row):
+    """Reminders before starting a task picked from the backlog
 
-        if sk == 'c':
-            input("Hit enter to continue.")
-            continue
+    Parameters:
+    row (pd.Series): Row of the task in the result of analyze
 
-        if sk == 's':
-            full = perform_analysis(fetch_ideas)
-            task = prompt_for_integer("Enter task index: ")
-            if task < 0 or task >= full.size:
-                break
-            t = start_timer(timedelta(hours=full.at[task, "Timebox"]),
-                            "Ask someone for help.")
-            row = full.loc[task]
-            
-            if row.estimate > 1 and not row.url:
-                display(Markdown(
+    Returns:
+    list of string: Markdown, one reminder per item
+    """
+    advice = []
+    # Comparing ufloats is deprecated in uncertainties.
+    estimate = getattr(row.estimate, 'nominal_value', row.estimate)
+    if estimate > 1 and not row.url:
+        advice.append(
 """
 Before starting work on a task larger than an hour, report your plan:
 - On a shared backlog
 - At a daily stand-up
 """
-            ))
+        )
 
-            if row.estimate > 4:
-                display(Markdown(
+    if estimate > 4:
+        advice.append(
 """
 Break down tasks larger than 4 hours. See:
 - [Process: Backlog grooming](https://docs.google.com/document/d/1bmRN4n0kbMN2EOhMKk62VMjpkAYcolWbKj0vPLyJKa8/edit#)
@@ -134,64 +136,161 @@ Break down tasks larger than 4 hours. See:
 
 [1]: https://docs.google.com/document/d/1hQ99w3ZnrLpwygfZJHFTKfbrYqwo-cXB5tZIBmKtw4o/edit#
 """
-            ))
+        )
 
-            if row.age < 3:
-                display(Markdown(
+    if row.age < 3:
+        advice.append(
 """
 Avoid recently created stories. See:
 - [Process: Handling interruptions](https://docs.google.com/document/d/1Y0LbIWeP4wnwm09FsC2YejIMFvrG3wfNtiVQVQaG4ew/edit)
 - [What if the build breaks?](https://docs.google.com/document/d/1wp7nLk6tkN8FlLELK7-IcbWgNlpmw51MC1DWSW9_yLc/edit)
 """
-            ))
-            if row.age < timedelta(weeks=2).days:
-                display(Markdown(
+        )
+    if row.age < timedelta(weeks=2).days:
+        advice.append(
 """
 This story was created in the last two weeks. Is it valuable because it is focal?
 """
-))
-            input("Hit enter to complete.")
-            t.cancel()
-            continue
-
-        tasks = prompt_for_integer("Enter unsorted tasks in {}: ".format(system.name))
-        if tasks == 0:
-            continue
-
-        t = start_timer(timedelta(minutes=2*tasks), "Timeout! Routine: Come back to this system.")
-        print("")
-
-        # It's inefficient to snooze to your task backlog items that are
-        # less than 60m even though there is risk they have focal value
-        # you could remove. Your only option is to apply a safety factor
-        # that adds the typical "focal value" of a small task. What boost
-        # (as a ratio of true value) does a typical small task get from
-        # being focal? Small tasks have little time to get focal?
-        focal_boost = 0.1
-
-        # It’s addicting to get “something” done even if it's not weighty
-        # ("gamification" of email).
-        gamification_boost = 0.05
-        
-        # Don't become a manager; you do the vast majority of long-term
-        # valuable learning in focused work (you learn almost nothing on
-        # small tasks).
-        #
-        # Knuth doesn't spend any time on tasks that don't involve focus.
-        #
-        # The W you enter for these mini tasks is often
-        # anchored off typical values on your task backlog; how bad is
-        # the anchoring?
-        learn_boost = 0.4
-
-        # The weight of the top item on your backlog is probably only
-        # ever going to get higher. It's questionable to do any task of
-        # lower weight than from the top of your backlog (opportunity
-        # costs).
-        weight_top_of_backlog = 5
-        weight_small = weight_top_of_backlog * (1 + focal_boost) * (1 + gamification_boost) * (1 + learn_boost)
-
-        display(Markdown("""
+)
+    return advice
+
+def view_prompt():
+    from taskbacklog.index import views
+    return "Enter a view ({}) to filter the backlog, or empty to pick a task: ".format(
+        ', '.join(views))
+
+def show_view(analysis_cache, name):
+    """Display the weightiest tasks of one of taskbacklog.index.views"""
+    from IPython.display import display
+    from taskbacklog.analysis import style_analysis
+    from taskbacklog.index import views
+
+    index = analysis_cache.index
+    rows = index.view(name, limit=table_page_size)
+    display(style_analysis(rows).set_caption('{}: {} of {} tasks'.format(
+        name, len(rows), index.count(**views[name]))))
+
+def personal_task_weights():
+    """Lowest weights worth doing now, for small and medium personal tasks
+
+    Returns:
+    (double, double): W_small and W_medium
+    """
+    # It's inefficient to snooze to your task backlog items that are
+    # less than 60m even though there is risk they have focal value
+    # you could remove. Your only option is to apply a safety factor
+    # that adds the typical "focal value" of a small task. What boost
+    # (as a ratio of true value) does a typical small task get from
+    # being focal? Small tasks have little time to get focal?
+    focal_boost = 0.1
+
+    # It’s addicting to get “something” done even if it's not weighty
+    # ("gamification" of email).
+    gamification_boost = 0.05
+
+    # Don't become a manager; you do the vast majority of long-term
+    # valuable learning in focused work (you learn almost nothing on
+    # small tasks).
+    #
+    # Knuth doesn't spend any time on tasks that don't involve focus.
+    #
+    # The W you enter for these mini tasks is often
+    # anchored off typical values on your task backlog; how bad is
+    # the anchoring?
+    learn_boost = 0.4
+
+    # The weight of the top item on your backlog is probably only
+    # ever going to get higher. It's questionable to do any task of
+    # lower weight than from the top of your backlog (opportunity
+    # costs).
+    weight_top_of_backlog = 5
+    weight_small = weight_threshold(focal_boost, gamification_boost, learn_boost,
+                                    weight_top_of_backlog)
+
+    # All the same for medium
+    focal_boost = 0.2
+    gamification_boost = 0.1
+    learn_boost = 0.6
+    weight_medium = weight_threshold(focal_boost, gamification_boost, learn_boost,
+                                     weight_top_of_backlog)
+    return weight_small, weight_medium
+
+def weight_threshold(focal_boost, gamification_boost, learn_boost,
+                     weight_top_of_backlog):
+    """Lowest weight of a task worth doing now rather than snoozing
+
+    See personal_task_weights for the meaning of the parameters. Works on
+    NumPy arrays as well, element by element (with broadcasting).
+    """
+    return weight_top_of_backlog * (1 + focal_boost) * (1 + gamification_boost) * (1 + learn_boost)
+
+class ThresholdSweep():
+    """How many backlog tasks every combination of parameters accepts
+
+    Evaluates weight_threshold on the grid of every combination of the
+    given parameter values, in one broadcast, and counts the tasks of an
+    analysis at or above every threshold with one binary search per point
+    over the sorted weights. The tasks above a threshold are always the
+    weightiest ones, so the task set of every grid point is a slice of one
+    ordering (see tasks).
+
+    Usage:
+
+        sweep = ThresholdSweep(full, learn_boost=np.linspace(0, 1, 101))
+        sweep.grid.plot(x='learn_boost', y='accepted')
+    """
+    def __init__(self,
+                 full,
+                 focal_boost=0.1,
+                 gamification_boost=0.05,
+                 learn_boost=0.4,
+                 weight_top_of_backlog=5):
+        """
+        Parameters:
+        full (pd.DataFrame): Result of analyze
+        focal_boost, gamification_boost, learn_boost, weight_top_of_backlog
+            (double or array-like): Values to try; the defaults are those
+            of small personal tasks (see personal_task_weights)
+        """
+        import numpy as np
+        import pandas as pd
+
+        weights = np.array(
+            [getattr(w, 'nominal_value', w) for w in full.weight], dtype=float)
+        # Weightiest last, ties in the order of the analysis
+        self.order = np.argsort(weights, kind='stable')
+        self.sorted_weights = weights[self.order]
+        self.labels = full.index.values
+
+        names = ['focal_boost', 'gamification_boost', 'learn_boost',
+                 'weight_top_of_backlog']
+        values = [np.atleast_1d(np.asarray(value, dtype=float)) for value in
+                  (focal_boost, gamification_boost, learn_boost,
+                   weight_top_of_backlog)]
+        axes = np.meshgrid(*values, indexing='ij')
+        thresholds = weight_threshold(*axes).ravel()
+        accepted = len(weights) - np.searchsorted(self.sorted_weights,
+                                                  thresholds, 'left')
+        self.grid = pd.DataFrame(dict(
+            {name: axis.ravel() for name, axis in zip(names, axes)},
+            threshold=thresholds,
+            accepted=accepted,
+            rejected=len(weights) - accepted))
+
+    def tasks(self, point, accepted=True):
+        """Labels (in the analysis) of the tasks accepted, or rejected, at
+        one point of the grid, weightiest first
+
+        Parameters:
+        point (int): Row of grid
+        """
+        rejected = self.grid.rejected.values[point]
+        rows = self.order[rejected:] if accepted else self.order[:rejected]
+        return self.labels[rows[::-1]]
+
+def size_bins(weight_small):
+    """Markdown on binning unsorted tasks by size"""
+    return """
 Perform up to one minute on TVE, then bin it:
 
 | Size range (bin) of E[E]    | Algorithm            |
@@ -204,16 +303,8 @@ Perform up to one minute on TVE, then bin it:
 ### Small personal tasks
 Unsubscribe from small tasks with $E[\\textbf{W}]$ lower
 than $W_{small}$ (currently """ + f"{weight_small}). Resolve as you encounter."
-        ))
-
-        # All the same for medium
-        focal_boost = 0.2
-        gamification_boost = 0.1
-        learn_boost = 0.6
-        weight_medium = weight_top_of_backlog * (1 + focal_boost) * (1 + gamification_boost) * (1 + learn_boost)
-        
-        display(Markdown(
-"""
+
+personal_task_steps = """
 ### Large personal task
 Steps:
 1. If the item has no cost of delay and is weighty, attempt
@@ -232,7 +323,73 @@ them on your task backlog and report you are going to do them at daily scrum.
 Spend up to 10\% of $E[\\textbf{E}]$ on TVE, or $6s < E[\\textbf{E}] < 24s$
 (i.e. do a mental analysis only). Resolve as you encounter; enter "y" then the weight below.
 """
-        ))
+
+medium_weight_prompt = """
+Estimate the weight of the medium task: 
+$$W = E[\\textbf{V}/\\textbf{E}]$$"""
+
+def say_no(weight, weight_medium):
+    return ("Say no to this task because $E[\\textbf{V}/\\textbf{E}] < W_{medium}$ " +
+            f" ({weight} < {weight_medium}). ")
+
+def schedule_day(fetch_ideas, analysis_cache=None):
+    """Skim your systems, then schedule tasks from your backlog
+
+    Parameters:
+    fetch_ideas (callable): Returns the PBIs
+    analysis_cache (AnalysisCache): Reuses the analysis across picks (and
+        across calls, if you pass the same one); by default one per call
+    """
+    from IPython.display import display, Markdown
+    from taskbacklog.analysis import AnalysisCache
+    from taskbacklog.index import views
+
+    if analysis_cache is None:
+        analysis_cache = AnalysisCache()
+
+    # Skim online task systems (starting with the most interruptive)
+    while True:
+        display(get_option_table())
+        sk = input("Enter system selection (empty to stop): ")
+        if sk not in systems:
+            break
+
+        system = systems[sk]
+        display(Markdown(system.tips))
+
+        if sk == 'c':
+            input("Hit enter to continue.")
+            continue
+
+        if sk == 's':
+            full = analysis_cache.perform_analysis(
+                fetch_ideas, page_size=table_page_size)
+            while True:
+                view = input(view_prompt())
+                if view not in views:
+                    break
+                show_view(analysis_cache, view)
+            task = prompt_for_integer("Enter task index: ")
+            if task < 0 or task >= full.size:
+                break
+            t = start_timer(timedelta(hours=full.at[task, "Timebox"]),
+                            "Ask someone for help.")
+            for advice in task_advice(full.loc[task]):
+                display(Markdown(advice))
+            input("Hit enter to complete.")
+            t.cancel()
+            continue
+
+        tasks = prompt_for_integer("Enter unsorted tasks in {}: ".format(system.name))
+        if tasks == 0:
+            continue
+
+        t = start_timer(timedelta(minutes=2*tasks), "Timeout! Routine: Come back to this system.")
+        print("")
+
+        weight_small, weight_medium = personal_task_weights()
+        display(Markdown(size_bins(weight_small)))
+        display(Markdown(personal_task_steps))
 
         while True:
             medium = input("Do you need to add 4m for a medium personal task (empty to stop)?")
@@ -240,16 +397,160 @@ Spend up to 10\% of $E[\\textbf{E}]$ on TVE, or $6s < E[\\textbf{E}] < 24s$
             if not medium:
                 break
 
-            display(Markdown("""
-Estimate the weight of the medium task: 
-$$W = E[\\textbf{V}/\\textbf{E}]$$"""
-            ))
+            display(Markdown(medium_weight_prompt))
             weight = prompt_for_integer("Estimated weight: ")
             if weight < weight_medium:
-                display(Markdown(
-"Say no to this task because $E[\\textbf{V}/\\textbf{E}] < W_{medium}$ " + f" ({weight} < {weight_medium}). "
-            ))
+                display(Markdown(say_no(weight, weight_medium)))
 
             t = start_timer(timedelta(minutes=8), "Timeout! Come back to this task.")
             input("Hit enter to complete.")
             print("")
+
+# An asyncio variant of schedule_day. Prompts are awaited, timers are
+# callbacks on the event loop (rather than a thread per timer), and the
+# backlog is fetched and analyzed in the background while you skim the other
+# systems. In a notebook (IPython 7+ runs cells on an event loop):
+#
+#     await schedule_day_async(fetch_ideas)
+
+async def ainput(prompt):
+    """input() without blocking the event loop"""
+    import asyncio
+    return await asyncio.get_running_loop().run_in_executor(None, input, prompt)
+
+async def aprompt_for_integer(prompt_string, ask=ainput):
+    while True:
+        try:
+            return int(await ask(prompt_string))
+        except ValueError:
+            print("Please enter an integer.")
+
+def start_timer_async(timebox, timeout_string):
+    """Like start_timer, on the running event loop
+
+    Returns:
+    asyncio.TimerHandle: Call cancel() to stop the timer
+    """
+    import asyncio
+    from IPython.display import display, Markdown
+    cutoff = (datetime.now() + timebox).strftime('%Y-%m-%d %H:%M')
+    display(Markdown(f"""
+- Timebox: {timebox}
+- Cutoff: {cutoff}"""
+))
+    return asyncio.get_running_loop().call_later(
+        timebox.total_seconds(), display, Markdown("""
+```diff
+- {}
+```
+""".format(timeout_string)))
+
+def _report_failure(future):
+    """Print why a background analysis failed, once nobody awaits it"""
+    if not future.cancelled() and future.exception() is not None:
+        print("The background analysis failed: {!r}".format(
+            future.exception()))
+
+async def schedule_day_async(fetch_ideas, analysis_cache=None, ask=ainput):
+    """Like schedule_day, with the analysis prepared in the background
+
+    The backlog is fetched and analyzed (see AnalysisCache.prepare) as soon
+    as this starts, and again after every scheduled task, so selecting the
+    Schedule system shows the table without waiting for JIRA.
+
+    Parameters:
+    fetch_ideas (callable): Returns the PBIs; runs on a worker thread
+    analysis_cache (AnalysisCache): See schedule_day
+    ask (coroutine function): Takes a prompt and returns the answer
+    """
+    import asyncio
+    from IPython.display import display, Markdown
+    from taskbacklog.analysis import AnalysisCache
+    from taskbacklog.index import views
+
+    if analysis_cache is None:
+        analysis_cache = AnalysisCache()
+    loop = asyncio.get_running_loop()
+
+    def refresh():
+        return loop.run_in_executor(
+            None, functools.partial(analysis_cache.prepare, fetch_ideas,
+                                    page_size=table_page_size))
+
+    prepared = refresh()
+    timer = None
+    try:
+        # Skim online task systems (starting with the most interruptive)
+        while True:
+            display(get_option_table())
+            sk = await ask("Enter system selection (empty to stop): ")
+            if sk not in systems:
+                break
+
+            system = systems[sk]
+            display(Markdown(system.tips))
+
+            if sk == 'c':
+                await ask("Hit enter to continue.")
+                continue
+
+            if sk == 's':
+                # Awaited here, a failure propagates to the caller instead.
+                waiting, prepared = prepared, None
+                await waiting
+                full = analysis_cache.show()
+                while True:
+                    view = await ask(view_prompt())
+                    if view not in views:
+                        break
+                    show_view(analysis_cache, view)
+                task = await aprompt_for_integer("Enter task index: ", ask)
+                if task < 0 or task >= full.size:
+                    break
+                timer = start_timer_async(
+                    timedelta(hours=full.at[task, "Timebox"]),
+                    "Ask someone for help.")
+                for advice in task_advice(full.loc[task]):
+                    display(Markdown(advice))
+                await ask("Hit enter to complete.")
+                timer.cancel()
+                prepared = refresh()
+                continue
+
+            tasks = await aprompt_for_integer(
+                "Enter unsorted tasks in {}: ".format(system.name), ask)
+            if tasks == 0:
+                continue
+
+            timer = start_timer_async(
+                timedelta(minutes=2*tasks),
+                "Timeout! Routine: Come back to this system.")
+            print("")
+
+            weight_small, weight_medium = personal_task_weights()
+            display(Markdown(size_bins(weight_small)))
+            display(Markdown(personal_task_steps))
+
+            while True:
+                medium = await ask(
+                    "Do you need to add 4m for a medium personal task (empty to stop)?")
+                timer.cancel()
+                if not medium:
+                    break
+
+                display(Markdown(medium_weight_prompt))
+                weight = await aprompt_for_integer("Estimated weight: ", ask)
+                if weight < weight_medium:
+                    display(Markdown(say_no(weight, weight_medium)))
+
+                timer = start_timer_async(timedelta(minutes=8),
+                                          "Timeout! Come back to this task.")
+                await ask("Hit enter to complete.")
+                print("")
+    finally:
+        if timer is not None:
+            timer.cancel()
+        # The last refresh may still be running, or have failed unseen;
+        # don't wait for it, but don't leave its error unretrieved either.
+        if prepared is not None:
+            prepared.add_done_callback(_report_failure)
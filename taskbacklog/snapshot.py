@@ -0,0 +1,224 @@
+"""Save an analysis to disk and load it back after a restart
+
+A snapshot holds the PBIs and tasks fetch_ideas returned, the result of
+analyze, and the rendered plot and table, so that the first schedule_day
+pick after reopening the notebook needs neither JIRA nor any computation.
+See AnalysisCache(snapshot=...).
+
+Uncertain quantities are stored as plain numbers: every independent variable
+(e.g. an estimate entered with ufloat) once, as a nominal value and std dev,
+and every ufloat as its nominal value plus its derivatives with respect to
+those variables, by variable number. Loading rebuilds ufloats with the same
+correlations (e.g. subtasks sharing the estimate of their story, or a weight
+and its estimate).
+"""
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+
+# Bump when the layout of a snapshot changes.
+snapshot_format = 1
+
+
+def source_fingerprint(fetch_ideas, *extra):
+    """Digest of the code of fetch_ideas (and anything else given)
+
+    A snapshot only loads for the same fetch_ideas: editing the function
+    (e.g. to add a PBI) makes the snapshot stale.
+    """
+    try:
+        source = inspect.getsource(fetch_ideas)
+    except (OSError, TypeError):
+        # Defined interactively without source, or not a function
+        source = getattr(fetch_ideas, '__qualname__', repr(fetch_ideas))
+    return hashlib.sha1(repr((source, extra)).encode('utf-8')).hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def package_fingerprint():
+    """Digest of the sources of this package
+
+    Snapshots hold objects of the package and the output of its analysis, so
+    they are only valid for the code that wrote them; a version number isn't
+    bumped on every change.
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha1()
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.py'):
+            digest.update(name.encode('utf-8'))
+            with open(os.path.join(directory, name), 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+class _Encoder():
+    def __init__(self):
+        self.variables = {}
+        self.variable_values = []
+        self.objects = {}
+        self.object_states = []
+
+    def value(self, value):
+        from taskbacklog.issues import Issue, ValueDimensions
+
+        if hasattr(value, 'derivatives'):
+            return ('u', value.nominal_value,
+                    [(self.variable(variable), derivative)
+                     for variable, derivative in value.derivatives.items()])
+        if isinstance(value, (Issue, ValueDimensions)):
+            return ('o', self.object(value))
+        if isinstance(value, list):
+            return ('l', [self.value(item) for item in value])
+        return ('v', value)
+
+    def variable(self, variable):
+        if id(variable) not in self.variables:
+            self.variables[id(variable)] = len(self.variable_values)
+            self.variable_values.append(
+                (variable.nominal_value, variable.std_dev))
+        return self.variables[id(variable)]
+
+    def object(self, obj):
+        # Objects (ValueDimensions in particular) are often shared; store
+        # each once and refer to it by number.
+        if id(obj) not in self.objects:
+            self.objects[id(obj)] = len(self.object_states)
+            state = [type(obj).__name__, None]
+            self.object_states.append(state)
+            state[1] = {
+                name: self.value(value)
+                for name, value in vars(obj).items()
+            }
+        return self.objects[id(obj)]
+
+
+class _Decoder():
+    def __init__(self, variable_values, object_states):
+        from uncertainties import ufloat
+        from uncertainties.core import AffineScalarFunc, LinearCombination
+
+        from taskbacklog import issues
+
+        self._affine = AffineScalarFunc
+        self._linear = LinearCombination
+        self.variables = [ufloat(n, s) for n, s in variable_values]
+        # Create every object first, so references between them resolve.
+        self.objects = [
+            getattr(issues, class_name).__new__(getattr(issues, class_name))
+            for class_name, _ in object_states
+        ]
+        for obj, (_, state) in zip(self.objects, object_states):
+            obj.__dict__.update(
+                (name, self.value(value)) for name, value in state.items())
+
+    def value(self, encoded):
+        kind, *payload = encoded
+        if kind == 'u':
+            nominal, derivatives = payload
+            # What uncertainties builds after arithmetic on the variables,
+            # without the arithmetic (most of the time of a load otherwise)
+            return self._affine(
+                nominal,
+                self._linear({
+                    self.variables[variable]: derivative
+                    for variable, derivative in derivatives
+                }))
+        if kind == 'o':
+            return self.objects[payload[0]]
+        if kind == 'l':
+            return [self.value(item) for item in payload[0]]
+        return payload[0]
+
+
+def save_snapshot(path, pbis, full, image, html, computed, fingerprint):
+    """Write a snapshot; see load_snapshot
+
+    Parameters:
+    path (string): File to write
+    pbis (list of PBI): What fetch_ideas returned
+    full (pd.DataFrame): Result of analyze
+    image (bytes): PNG of the plot
+    html (string): Rendered table
+    computed (datetime): When full was computed
+    fingerprint (string): See source_fingerprint
+    """
+    from taskbacklog import __version__
+
+    encoder = _Encoder()
+    pbis = [encoder.value(pbi) for pbi in pbis]
+    columns = {}
+    for name in full.columns:
+        values = full[name].values
+        if values.dtype == object:
+            values = [encoder.value(value) for value in values]
+        columns[name] = values
+    snapshot = {
+        'format': snapshot_format,
+        'version': __version__,
+        'package': package_fingerprint(),
+        'fingerprint': fingerprint,
+        'computed': computed,
+        'variables': encoder.variable_values,
+        'objects': encoder.object_states,
+        'pbis': pbis,
+        'columns': columns,
+        'column_order': list(full.columns),
+        'index': full.index.values,
+        'image': image,
+        'html': html,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + '.tmp', 'wb') as f:
+        pickle.dump(snapshot, f, protocol=4)
+    os.replace(path + '.tmp', path)
+
+
+def load_snapshot(path, fingerprint):
+    """Read a snapshot written by the same code of the package for the same
+    fingerprint
+
+    Returns:
+    dict: pbis, full, image, html and computed (as given to save_snapshot);
+        None if there is no such snapshot
+    """
+    try:
+        return _load_snapshot(path, fingerprint)
+    except Exception:
+        # A snapshot is only ever a shortcut: whatever fails (a missing or
+        # truncated file, a class that no longer exists, a pickle of another
+        # version of numpy or pandas), compute the analysis instead.
+        return None
+
+
+def _load_snapshot(path, fingerprint):
+    import pandas as pd
+
+    from taskbacklog import __version__
+
+    try:
+        with open(path, 'rb') as f:
+            snapshot = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    if (snapshot.get('format') != snapshot_format
+            or snapshot.get('version') != __version__
+            or snapshot.get('package') != package_fingerprint()
+            or snapshot.get('fingerprint') != fingerprint):
+        return None
+    decoder = _Decoder(snapshot['variables'], snapshot['objects'])
+    columns = {}
+    for name in snapshot['column_order']:
+        values = snapshot['columns'][name]
+        if isinstance(values, list):
+            values = [decoder.value(value) for value in values]
+        columns[name] = values
+    return {
+        'pbis': [decoder.value(pbi) for pbi in snapshot['pbis']],
+        'full': pd.DataFrame(columns, index=snapshot['index']),
+        'image': snapshot['image'],
+        'html': snapshot['html'],
+        'computed': snapshot['computed'],
+    }
@@ -0,0 +1,169 @@
+from array import array
+from datetime import date
+import tempfile
+
+from taskbacklog.analysis import nominal_std
+
+
+class BacklogStore():
+    """Compact, column-oriented copy of a backlog
+
+    Every PBI, ValueDimensions and Task becomes one entry in a few typed
+    arrays rather than an object with an attribute dict. Summaries and URLs
+    are stored once in a string table and referenced by index. Descriptions
+    (often long, when imported from JIRA) are never read by the analysis, so
+    they are written to a temporary file and only read back on request.
+
+    The store keeps what the analysis needs (see taskbacklog.analysis.
+    task_columns) plus summaries, URLs and descriptions; pass it to
+    perform_analysis in place of fetch_ideas.
+    """
+    def __init__(self):
+        self.strings = []
+        self.string_ids = {}
+
+        # One entry per PBI
+        self.pbi_value_nominal = array('d')
+        self.pbi_value_std = array('d')
+        self.pbi_created = array('l')
+
+        # One entry per distinct ValueDimensions
+        self.dimension_ids = {}
+        self.dimension_objects = []
+        self.learning_ratio_nominal = array('d')
+        self.learning_ratio_std = array('d')
+        self.other_nominal = array('d')
+        self.other_std = array('d')
+
+        # One entry per Task
+        self.summary_ids = array('l')
+        self.url_ids = array('l')
+        self.pbi = array('l')
+        self.value_dimensions = array('l')
+        self.wip_ratio = array('d')
+        self.estimate_nominal = array('d')
+        self.estimate_std = array('d')
+        self.description_offsets = array('q')
+        self.description_lengths = array('l')
+
+        self.descriptions = tempfile.TemporaryFile()
+        self.descriptions_size = 0
+
+    @classmethod
+    def from_pbis(cls, pbis):
+        store = cls()
+        store.extend(pbis)
+        return store
+
+    def __len__(self):
+        return len(self.pbi)
+
+    def extend(self, pbis):
+        for pbi in pbis:
+            self.add(pbi)
+
+    def add(self, pbi):
+        """Append a PBI and all of its tasks"""
+        pbi_index = len(self.pbi_value_nominal)
+        value = nominal_std(pbi.V)
+        self.pbi_value_nominal.append(value[0])
+        self.pbi_value_std.append(value[1])
+        self.pbi_created.append(pbi.creation_date.toordinal())
+        for task in pbi.tasks:
+            self.summary_ids.append(self._string_id(task.summary))
+            self.url_ids.append(self._string_id(task.url))
+            self.pbi.append(pbi_index)
+            self.value_dimensions.append(
+                self._dimension_id(task.value_dimensions))
+            self.wip_ratio.append(task.wip_ratio)
+            estimate = nominal_std(task.E)
+            self.estimate_nominal.append(estimate[0])
+            self.estimate_std.append(estimate[1])
+            self._add_description(task.description)
+
+    def _string_id(self, string):
+        string_id = self.string_ids.get(string)
+        if string_id is None:
+            string_id = self.string_ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    def _dimension_id(self, value_dimensions):
+        # Keyed by identity, like task_columns; holding on to the (few)
+        # objects keeps their ids from being reused.
+        key = id(value_dimensions)
+        if key not in self.dimension_ids:
+            self.dimension_ids[key] = len(self.learning_ratio_nominal)
+            self.dimension_objects.append(value_dimensions)
+            learning_ratio = nominal_std(value_dimensions.learning_ratio)
+            other = nominal_std(value_dimensions.other_hours)
+            self.learning_ratio_nominal.append(learning_ratio[0])
+            self.learning_ratio_std.append(learning_ratio[1])
+            self.other_nominal.append(other[0])
+            self.other_std.append(other[1])
+        return self.dimension_ids[key]
+
+    def _add_description(self, description):
+        encoded = (description or '').encode('utf-8')
+        self.descriptions.seek(self.descriptions_size)
+        self.descriptions.write(encoded)
+        self.description_offsets.append(self.descriptions_size)
+        self.description_lengths.append(len(encoded))
+        self.descriptions_size += len(encoded)
+
+    def summary(self, i):
+        return self.strings[self.summary_ids[i]]
+
+    def url(self, i):
+        return self.strings[self.url_ids[i]]
+
+    def description(self, i):
+        """Description of task i, read back from disk"""
+        self.descriptions.seek(self.description_offsets[i])
+        return self.descriptions.read(
+            self.description_lengths[i]).decode('utf-8')
+
+    def columns(self):
+        """Same frame as taskbacklog.analysis.task_columns"""
+        import numpy as np
+        import pandas as pd
+
+        # A copy through the buffer protocol; a view would keep the arrays
+        # from growing.
+        def column(values, dtype=None):
+            return np.array(values, dtype=dtype or values.typecode)
+
+        strings = np.array(self.strings, dtype=object)
+        pbi = column(self.pbi)
+        dimensions = column(self.value_dimensions)
+        today = date.today().toordinal()
+        return pd.DataFrame({
+            'summary':
+            strings[column(self.summary_ids)],
+            'url':
+            strings[column(self.url_ids)],
+            'age':
+            today - column(self.pbi_created)[pbi],
+            'pbi':
+            pbi,
+            'value_dimensions':
+            dimensions,
+            'wip_ratio':
+            column(self.wip_ratio),
+            'estimate_nominal':
+            column(self.estimate_nominal),
+            'estimate_std':
+            column(self.estimate_std),
+            'value_nominal':
+            column(self.pbi_value_nominal)[pbi],
+            'value_std':
+            column(self.pbi_value_std)[pbi],
+            'learning_ratio_nominal':
+            column(self.learning_ratio_nominal)[dimensions],
+            'learning_ratio_std':
+            column(self.learning_ratio_std)[dimensions],
+            'other_nominal':
+            column(self.other_nominal)[dimensions],
+            'other_std':
+            column(self.other_std)[dimensions],
+        })
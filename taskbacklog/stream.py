@@ -0,0 +1,142 @@
+import heapq
+import itertools
+from datetime import date
+
+from taskbacklog import instrument
+from taskbacklog.analysis import nominal_std
+
+
+class TopTasks():
+    """The k weightiest tasks of a backlog, fed one PBI at a time
+
+    The weight of a task only depends on its own PBI, so it can be computed
+    as soon as the PBI arrives. Only the k weightiest tasks so far are kept,
+    in a heap, so memory stays flat however large the backlog. Every task
+    weightier than one of the top k is itself in the top k, so their
+    calendar distances are exact.
+    """
+    def __init__(self, k=50):
+        """
+        Parameters:
+        k (int): Number of tasks to keep
+        """
+        self.k = k
+        # Min-heap of (nominal weight, -task number, row); on equal weights
+        # the later task goes first, as in a stable sort.
+        self.heap = []
+        self.counter = itertools.count()
+        self.today = date.today()
+
+        # Running totals over every task seen, kept or not
+        self.pbis = 0
+        self.tasks = 0
+        self.hours = 0.0
+
+    def add(self, pbi):
+        """Weigh the tasks of a PBI and keep those in the top k"""
+        self.pbis += 1
+        if not pbi.tasks:
+            return
+        E_pbi = pbi.E()
+        age = (self.today - pbi.creation_date).days
+        for task in pbi.tasks:
+            number = next(self.counter)
+            estimate = nominal_std(task.E)[0]
+            self.tasks += 1
+            self.hours += estimate
+            # See taskbacklog.analysis.analyze
+            weight = (pbi.V * task.E / E_pbi +
+                      task.value_dimensions.total_value_hours(task.E)) / (
+                          task.E * task.wip_ratio)
+            key = (nominal_std(weight)[0], -number)
+            if len(self.heap) == self.k and key <= self.heap[0][:2]:
+                continue
+            row = {
+                'summary': task.summary,
+                'estimate': task.E,
+                'weight': weight,
+                'url': task.url,
+                'age': age,
+                'Timebox': task.Timebox(),
+                'wip_ratio': task.wip_ratio
+            }
+            if len(self.heap) < self.k:
+                heapq.heappush(self.heap, key + (row, ))
+            else:
+                heapq.heapreplace(self.heap, key + (row, ))
+
+    def extend(self, pbis):
+        for pbi in pbis:
+            self.add(pbi)
+
+    def to_frame(self):
+        """The same columns as analyze, weightiest first
+
+        Rows are labeled with the position of the task in the backlog, like
+        the rows of analyze.
+        """
+        import pandas as pd
+
+        entries = sorted(self.heap, reverse=True)
+        full = pd.DataFrame([row for _, _, row in entries],
+                            index=[-number for _, number, _ in entries],
+                            columns=[
+                                'summary', 'estimate', 'weight', 'url', 'age',
+                                'Timebox', 'wip_ratio'
+                            ])
+        full['calendar_distance_hours'] = list(
+            itertools.accumulate(
+                nominal_std(estimate)[0] for estimate in full.estimate))
+        return full
+
+
+def analyze_stream(fetch_ideas, top_k=50, every=100):
+    """Rank a backlog while it loads
+
+    Parameters:
+    fetch_ideas (callable): Returns the PBIs; a generator is consumed as it
+        yields, without holding on to the PBIs
+    top_k (int): Tasks to keep
+    every (int): Yield the ranking so far after this many PBIs; None yields
+        only the final ranking
+
+    Returns:
+    generator: TopTasks after every `every` PBIs and once at the end; call
+        to_frame for a table
+    """
+    top = TopTasks(top_k)
+    with instrument.span('stream', top_k=top_k):
+        for pbi in fetch_ideas():
+            top.add(pbi)
+            if every and top.pbis % every == 0:
+                yield top
+    instrument.count('rows', top.tasks)
+    if not (every and top.pbis and top.pbis % every == 0):
+        yield top
+
+
+def perform_streaming_analysis(fetch_ideas, top_k=50, every=100):
+    """Show the weightiest tasks of a backlog, refreshed while it loads
+
+    Like taskbacklog.analysis.perform_analysis limited to the top_k tasks,
+    without the plot. The table appears after the first `every` PBIs and is
+    updated in place as more arrive.
+
+    Returns:
+    pd.DataFrame: The top_k tasks, weightiest first
+    """
+    from IPython.core.display import display
+
+    from taskbacklog.analysis import style_analysis
+
+    handle = None
+    for top in analyze_stream(fetch_ideas, top_k, every):
+        full = top.to_frame()
+        caption = 'Top {} of {} tasks ({:.1f} hours) in {} PBIs'.format(
+            len(full), top.tasks, top.hours, top.pbis)
+        styler = style_analysis(full).set_caption(caption)
+        if handle is None:
+            handle = display(styler, display_id=True)
+        else:
+            handle.update(styler)
+    return full
@@ -0,0 +1,114 @@
+from datetime import date
+
+import numpy as np
+import pytest
+from uncertainties import ufloat
+
+from benchmarks.synthetic import synthetic_backlog
+from taskbacklog import analysis
+from taskbacklog.analysis import (_ufloat_frame, analyze, render_plot,
+                                  task_columns, weight_columns,
+                                  weight_part_columns)
+from taskbacklog.issues import PBI, Task, ValueDimensions, get_ureg
+
+
+@pytest.fixture(scope='module')
+def pbis():
+    return synthetic_backlog(300, seed=1)
+
+
+def nominal(values):
+    return [value.nominal_value for value in values]
+
+
+def test_weight_columns_match_ufloats(pbis):
+    _, nominal_frame, std, _ = _ufloat_frame(pbis)
+    weight, weight_std = weight_columns(task_columns(pbis))
+    np.testing.assert_allclose(weight,
+                               nominal_frame.weight.values,
+                               rtol=1e-12)
+    np.testing.assert_allclose(weight_std, std.weight.values, rtol=1e-9)
+
+
+def test_columnar_ranks_like_ufloats(pbis):
+    ufloats = analyze(lambda: pbis)
+    columnar = analyze(lambda: pbis, columnar=True)
+    np.testing.assert_allclose(nominal(columnar.weight),
+                               nominal(ufloats.weight),
+                               rtol=1e-12)
+    np.testing.assert_allclose(columnar.calendar_distance_hours.values,
+                               ufloats.calendar_distance_hours.values,
+                               rtol=1e-12)
+    assert np.all(np.diff(nominal(ufloats.weight)) <= 0)
+
+
+def test_empty_backlog():
+    assert analyze(lambda: [], columnar=True).empty
+
+
+def test_samples_reproducible_with_seed(pbis):
+    first = analyze(lambda: pbis, samples=200, seed=3)
+    second = analyze(lambda: pbis, samples=200, seed=3, columnar=True)
+    assert list(first.index) == list(second.index)
+    np.testing.assert_array_equal(first.expected_rank.values,
+                                  second.expected_rank.values)
+
+
+def test_estimates_without_uncertainty():
+    vd = ValueDimensions(0.1)
+    tasks = Task.from_estimates(['a', 'b'], np.array([1.0, 2.0]), vd)
+    full = analyze(
+        lambda: [PBI('p', 5.0, date(2020, 1, 1), vd, tasks=tasks)])
+    assert list(full.Timebox) == [1.0, 2.0]
+
+
+def test_other_value_is_stored_in_hours():
+    vd = ValueDimensions(0.5)
+    vd.other = 2 * get_ureg().days
+    assert vd.other_hours == pytest.approx(48.0)
+    assert vd.other.to('hours').magnitude == pytest.approx(48.0)
+    assert vd.total_value_hours(4.0) == pytest.approx(50.0)
+
+
+def test_plot_cache_keeps_recently_used_images(monkeypatch):
+    monkeypatch.setattr(analysis, '_images', type(analysis._images)())
+    monkeypatch.setattr(analysis, '_max_images', 2)
+    first, second, third = (analyze(lambda: synthetic_backlog(5, seed=seed))
+                            for seed in range(3))
+    image = render_plot(first)
+    render_plot(second)
+    # A hit makes first the most recently used; third evicts second.
+    assert render_plot(first) is image
+    render_plot(third)
+    assert render_plot(first) is image
+    assert len(analysis._images) == 2
+
+
+def test_weight_parts_add_up(pbis):
+    columns = task_columns(pbis)
+    share, _, own, _ = weight_part_columns(columns)
+    np.testing.assert_allclose(share + own,
+                               weight_columns(columns)[0],
+                               rtol=1e-12)
+
+
+@pytest.mark.parametrize('columnar', [False, True])
+def test_dedupe_counts_own_value_once(columnar):
+    vd = ValueDimensions(0.5, 2.0)
+
+    def shared():
+        return Task('shared', ufloat(2, 0.5), vd, url='https://shared')
+
+    pbis = [
+        PBI('a',
+            ufloat(10, 1),
+            date(2020, 1, 1),
+            vd,
+            tasks=[shared(), Task('other', ufloat(3, 1), vd, url='u')]),
+        PBI('b', ufloat(6, 1), date(2020, 1, 1), vd, tasks=[shared()]),
+    ]
+    full = analyze(lambda: pbis, dedupe=True, columnar=columnar)
+    assert list(full.summary).count('shared') == 1
+    weight = full.set_index('summary').weight['shared']
+    # Shares 10 / 5 and 6 / 2, plus 0.5 + 2 / 2 once
+    assert weight.nominal_value == pytest.approx(6.5)
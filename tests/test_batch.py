@@ -0,0 +1,24 @@
+import functools
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_backlog
+from taskbacklog.analysis import analyze, compact_columns
+from taskbacklog.batch import analyze_backlogs
+
+
+def test_matches_serial_analyses():
+    backlogs = {
+        'a': functools.partial(synthetic_backlog, 50, seed=7),
+        'b': functools.partial(synthetic_backlog, 80, seed=8),
+    }
+    merged = analyze_backlogs(backlogs, max_workers=2, columnar=True)
+    assert np.all(np.diff(merged.weight.values) <= 0)
+    for name, fetch_ideas in backlogs.items():
+        expected = compact_columns(analyze(fetch_ideas, columnar=True))
+        rows = merged[merged.backlog == name].set_index('task').loc[
+            expected['task']]
+        for column in ('weight', 'weight_std', 'calendar_distance_hours'):
+            np.testing.assert_allclose(rows[column].values,
+                                       expected[column],
+                                       rtol=1e-12)
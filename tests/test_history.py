@@ -0,0 +1,74 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from benchmarks.synthetic import synthetic_backlog
+from taskbacklog.analysis import analyze, compact_columns
+from taskbacklog.history import BacklogHistory, snapshot_columns
+
+times = [
+    datetime(2020, 1, 1, 9),
+    datetime(2020, 1, 1, 17, 30, 0, 250),
+    datetime(2020, 1, 2, 9),
+]
+
+
+@pytest.fixture(scope='module')
+def fulls():
+    # The backlog grows by ten tasks every snapshot; about a fifth of the
+    # tasks have no URL.
+    return [
+        analyze(lambda: synthetic_backlog(20 + 10 * i, seed=9),
+                columnar=True) for i in range(len(times))
+    ]
+
+
+@pytest.fixture
+def history(tmp_path, fulls):
+    history = BacklogHistory(str(tmp_path))
+    for time, full in zip(times, fulls):
+        history.write(full, time)
+    return history
+
+
+def test_times_and_table(history, fulls):
+    assert history.times() == times
+    assert history.times(times[1], times[2]) == [times[1]]
+    table = history.table(times[1], columns=['time', 'rank', 'weight'])
+    assert table.column_names == ['time', 'rank', 'weight']
+    assert table.num_rows == len(fulls[1]) + len(fulls[2])
+    np.testing.assert_array_equal(
+        table['weight'].to_numpy(),
+        np.concatenate(
+            [compact_columns(full)['weight'] for full in fulls[1:]]))
+    assert set(history.table().column_names) == {'time', 'rank'
+                                                 } | set(snapshot_columns)
+    assert history.table(end=times[0]) is None
+
+
+def test_trajectory(history, fulls):
+    full = fulls[-1]
+    url = full.url[full.url != ''].iloc[0]
+    trajectory = history.trajectory(url)
+    assert list(trajectory.index) == times
+    assert list(trajectory['rank']) == [
+        list(f.url).index(url) for f in fulls
+    ]
+    # Tasks without a URL are stored with a null one; they can't be
+    # followed, and never match a URL.
+    assert (full.url == '').any()
+    assert history.table(times[-1])['url'].null_count == (full.url == '').sum()
+    assert history.trajectory(None).empty
+    assert history.trajectory('').empty
+    assert history.trajectory('https://unknown').empty
+
+
+def test_size_per_day_uses_the_last_snapshot(history, fulls):
+    size = history.size_per_day()
+    assert list(size.index) == [times[0].date(), times[2].date()]
+    assert list(size.tasks) == [len(fulls[1]), len(fulls[2])]
+    assert size.hours.iloc[0] == pytest.approx(
+        compact_columns(fulls[1])['estimate'].sum())
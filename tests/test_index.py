@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import synthetic_backlog
+from taskbacklog.analysis import analyze
+from taskbacklog.index import BacklogIndex, views
+
+
+@pytest.fixture(scope='module')
+def full():
+    return analyze(lambda: synthetic_backlog(300, seed=10))
+
+
+def expected_mask(full,
+                  estimate_under=None,
+                  estimate_over=None,
+                  age_under=None,
+                  age_over=None,
+                  has_url=None,
+                  wip=None):
+    estimate = np.array([e.nominal_value for e in full.estimate])
+    mask = np.ones(len(full), dtype=bool)
+    if estimate_under is not None:
+        mask &= estimate < estimate_under
+    if estimate_over is not None:
+        mask &= estimate > estimate_over
+    if age_under is not None:
+        mask &= full.age.values < age_under
+    if age_over is not None:
+        mask &= full.age.values > age_over
+    if has_url is not None:
+        mask &= (full.url.values != '') == has_url
+    if wip is not None:
+        mask &= (full.wip_ratio.values != 1.0) == wip
+    return mask
+
+
+def test_queries_match_masks(full):
+    index = BacklogIndex(full)
+    # Ages are whole days, so thresholds at existing values test that the
+    # bounds are strict.
+    age = int(full.age.median())
+    estimate = full.estimate.iloc[0].nominal_value
+    conditions = [
+        {},
+        dict(estimate_under=estimate),
+        dict(estimate_over=estimate, age_under=age),
+        dict(age_over=age, has_url=False),
+        dict(estimate_over=1, estimate_under=4, wip=True),
+        dict(age_under=age, age_over=age),
+    ] + list(views.values())
+    for condition in conditions:
+        mask = expected_mask(full, **condition)
+        np.testing.assert_array_equal(index.mask(**condition), mask)
+        assert index.count(**condition) == mask.sum()
+        assert list(index.query(limit=5, **condition).index) == list(
+            full.index[mask][:5])
@@ -0,0 +1,173 @@
+import threading
+
+import pytest
+
+pytest.importorskip('jira')
+
+from jira import JIRA
+
+from benchmarks.fake_jira import FakeJiraServer
+from benchmarks.synthetic import synthetic_issues
+from taskbacklog.analysis import nominal_std
+from taskbacklog.issues import (JiraPool, Task, ValueDimensions,
+                               _comment_merge_request, _retry_after)
+
+vd = ValueDimensions(0.1)
+
+
+@pytest.fixture(scope='module')
+def issues():
+    issues = synthetic_issues(20, comments=5, seed=3)
+    # One story moved to another project
+    issues[0] = dict(issues[0], key='MOVED-0')
+    return issues
+
+
+@pytest.fixture
+def server(issues):
+    # Two comments come with an issue; the rest take more requests.
+    with FakeJiraServer(issues, embedded_comments=2,
+                        moved={'STORY-0': 'MOVED-0'}) as server:
+        Task.jira = JIRA(server.url, get_server_info=False, max_retries=0)
+        yield server
+    Task.jira = Task.jira_cache = Task.jira_pool = None
+
+
+@pytest.fixture
+def stories(issues):
+    return ['STORY-0'] + [
+        issue['key'] for issue in issues if issue['key'].startswith('STORY')
+    ]
+
+
+def summary(task_lists):
+    return [[(task.summary, task.url, task.wip_ratio) + nominal_std(task.E)
+             for task in tasks] for tasks in task_lists]
+
+
+def serial(stories):
+    return [Task.from_jira_story(jid, vd, 3.0) for jid in stories]
+
+
+def test_batch_matches_serial(server, stories):
+    expected = summary(serial(stories))
+    assert summary(Task.from_jira_story_batch(stories, vd, 3.0)) == expected
+    tasks = ['TASK-{}'.format(i) for i in range(10)]
+    assert summary(Task.from_jira_batch(tasks, vd, estimate=2.0)) == summary(
+        [Task.from_jira(jid, vd, estimate=2.0) for jid in tasks])
+
+
+def test_warm_cache_makes_no_requests(server, stories, tmp_path):
+    expected = summary(serial(stories))
+    Task.use_jira_cache(str(tmp_path / 'jira.sqlite'), sync=False)
+    assert summary(serial(stories)) == expected
+    # Including the moved story, requested by its old key
+    before = server.requests
+    assert summary(serial(stories)) == expected
+    assert summary(Task.from_jira_story_batch(stories, vd, 3.0)) == expected
+    assert server.requests == before
+
+
+def test_session_fetches_every_issue_once(server, stories):
+    with Task.jira_session():
+        expected = summary(serial(stories))
+        before = server.requests
+        # Another PBI importing the same stories
+        assert summary(serial(stories)) == expected
+    assert server.requests == before
+
+
+def connect_to(server):
+    return lambda: JIRA(server.url, get_server_info=False, max_retries=0)
+
+
+def test_concurrent_matches_serial(server, stories):
+    expected = summary(serial(stories))
+    # More workers than clients: some wait for a client
+    assert summary(
+        Task.from_jira_story_concurrent(stories,
+                                        vd,
+                                        3.0,
+                                        max_workers=4,
+                                        pool=JiraPool(
+                                            2, connect_to(server)))) == expected
+
+
+def test_rate_limited_concurrent_import(issues, stories):
+    with FakeJiraServer(issues, rate_limit=10,
+                        moved={'STORY-0': 'MOVED-0'}) as server:
+        Task.jira = connect_to(server)()
+        try:
+            expected = summary(serial(stories[:8]))
+            assert summary(
+                Task.from_jira_story_concurrent(
+                    stories[:8], vd, 3.0,
+                    pool=JiraPool(4, connect_to(server)))) == expected
+            assert server.rejected > 0
+        finally:
+            Task.jira = None
+
+
+def test_pool_releases_failed_logins():
+    attempts = []
+    started = threading.Event()
+
+    def connect():
+        attempts.append(None)
+        # Fail only once a second thread waits for the one place
+        started.wait(5)
+        raise RuntimeError('CAPTCHA_CHALLENGE')
+
+    pool = JiraPool(1, connect)
+    errors = []
+
+    def borrow():
+        try:
+            with pool.client():
+                pass
+        except RuntimeError as error:
+            errors.append(error)
+
+    threads = [
+        threading.Thread(target=borrow, daemon=True) for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    started.set()
+    for thread in threads:
+        thread.join(10)
+    assert not any(thread.is_alive() for thread in threads)
+    assert len(errors) == len(attempts) == 2
+    assert pool.created == 0
+
+
+def test_retry_after():
+    assert _retry_after('3', 1.0) == 3.0
+    assert _retry_after('Wed, 21 Oct 2015 07:28:00 GMT', 1.0) == 0.0
+    assert _retry_after('soon', 1.0) == 1.0
+    assert _retry_after(None, 2.0) == 2.0
+
+
+def test_edited_comments_are_rescanned():
+    comment = {
+        'self': 'https://jira.example.com/rest/api/2/issue/1/comment/7',
+        'id': '7',
+        'updated': '2020-01-01T00:00:00.000+0000',
+        'body': 'Opened [a merge request|https://git.example.com/1]',
+    }
+    assert _comment_merge_request(comment) == 'https://git.example.com/1'
+    assert _comment_merge_request(
+        dict(comment, updated='2020-01-02T00:00:00.000+0000',
+             body='Abandoned')) is None
+    # The same ID on another JIRA instance
+    assert _comment_merge_request(
+        dict(comment,
+             self='https://other.example.com/rest/api/2/issue/1/comment/7',
+             body='Opened [a merge request|https://git.example.com/2]')
+    ) == 'https://git.example.com/2'
+    # Without a URL or a time, the body tells edits apart
+    bare = {'id': '8', 'body': 'Nothing yet'}
+    assert _comment_merge_request(bare) is None
+    assert _comment_merge_request(
+        dict(bare, body='Opened [a merge request|https://git.example.com/3]')
+    ) == 'https://git.example.com/3'
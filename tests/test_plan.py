@@ -0,0 +1,50 @@
+import itertools
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_backlog
+from taskbacklog.analysis import analyze
+from taskbacklog.plan import _contenders, _knapsack, plan_days
+
+
+def brute_force(sizes, values, capacity):
+    best = 0.0
+    for count in range(len(sizes) + 1):
+        for chosen in itertools.combinations(range(len(sizes)), count):
+            if sum(sizes[i] for i in chosen) <= capacity:
+                best = max(best, sum(values[i] for i in chosen))
+    return best
+
+
+def test_knapsack_is_optimal():
+    random = np.random.RandomState(0)
+    for _ in range(200):
+        items = random.randint(1, 11)
+        sizes = random.randint(1, 9, items)
+        values = random.uniform(0, 10, items)
+        capacity = random.randint(0, 20)
+        chosen = _knapsack(sizes, values, capacity)
+        assert sizes[chosen].sum() <= capacity
+        assert values[chosen].sum() == brute_force(sizes, values, capacity)
+        contenders = _contenders(sizes, values, capacity)
+        assert values[contenders][_knapsack(
+            sizes[contenders], values[contenders],
+            capacity)].sum() == values[chosen].sum()
+
+
+def test_plan_days_fills_days_without_overlap():
+    full = analyze(lambda: synthetic_backlog(400, seed=2))
+    planned = plan_days(full, [6, 3.5], min_age=0)
+    assert not planned.index.duplicated().any()
+    for day, hours in enumerate([6, 3.5]):
+        assert planned[planned.day == day].Timebox.sum() <= hours
+
+
+def test_plan_days_takes_hours_as_array():
+    full = analyze(lambda: synthetic_backlog(100, seed=3))
+    planned = plan_days(full, np.array([4.0, 3.0]), min_age=0)
+    assert set(planned.day) <= {0, 1}
+    assert planned.equals(plan_days(full, [4.0, 3.0], min_age=0))
+    # One value for every day
+    assert plan_days(full, 4.0, days=2,
+                     min_age=0).equals(plan_days(full, [4.0, 4.0], min_age=0))
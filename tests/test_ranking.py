@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from uncertainties import ufloat
+
+from benchmarks.synthetic import synthetic_backlog
+from taskbacklog.analysis import analyze
+from taskbacklog.ranking import RankedBacklog
+
+
+def weights(full):
+    return np.sort([w.nominal_value for w in full.weight])
+
+
+def test_updates_match_a_new_analysis():
+    pbis = synthetic_backlog(200, seed=4)
+    full = analyze(lambda: pbis, samples=50)
+    backlog = RankedBacklog.from_frame(full, pbis, seed=0)
+    assert 'p_top' not in backlog.to_frame()
+
+    pbi = next(pbi for pbi in pbis if len(pbi.tasks) == 3)
+    keys = {id(task): key for key, task in enumerate(
+        task for pbi in pbis for task in pbi.tasks)}
+    backlog.reestimate(keys[id(pbi.tasks[0])], ufloat(7, 1))
+    pbi.tasks[0].E = ufloat(7, 1)
+    backlog.remove(keys[id(pbi.tasks[1])])
+    del pbi.tasks[1]
+
+    np.testing.assert_allclose(weights(backlog.to_frame()),
+                               weights(analyze(lambda: pbis)),
+                               rtol=1e-12)
+
+
+def test_reestimate_needs_weight_without_pbis():
+    full = analyze(lambda: synthetic_backlog(10, seed=5))
+    backlog = RankedBacklog.from_frame(full)
+    with pytest.raises(ValueError):
+        backlog.reestimate(full.index[0], 3.0)
+    backlog.reestimate(full.index[0], 3.0, weight=100.0)
+    assert backlog.head(1) == [full.index[0]]
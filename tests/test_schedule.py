@@ -0,0 +1,107 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+pytest.importorskip('IPython')
+
+from benchmarks.synthetic import synthetic_backlog
+from taskbacklog import schedule
+from taskbacklog.analysis import AnalysisCache, analyze
+
+
+def scripted(answers, on_answer=None):
+    """An ask for schedule_day_async that gives the answers in order"""
+    answers = list(answers)
+
+    async def ask(prompt):
+        # Let the background analysis run, as a person would.
+        await asyncio.sleep(0.01)
+        answer = answers.pop(0)
+        if on_answer is not None:
+            on_answer(answer)
+        return answer
+
+    return ask
+
+
+@pytest.fixture
+def timers(monkeypatch):
+    timers = []
+
+    def start_timer_async(timebox, timeout_string):
+        timers.append(asyncio.get_running_loop().call_later(
+            timebox.total_seconds(), print, timeout_string))
+        return timers[-1]
+
+    monkeypatch.setattr(schedule, 'start_timer_async', start_timer_async)
+    return timers
+
+
+def test_schedule_waits_for_the_analysis(timers):
+    selected = threading.Event()
+    fetched = []
+
+    def fetch_ideas():
+        # Still fetching when the Schedule system is selected
+        assert selected.wait(10)
+        fetched.append(True)
+        return synthetic_backlog(10, seed=6)
+
+    def on_answer(answer):
+        if answer == 's':
+            selected.set()
+
+    analysis_cache = AnalysisCache()
+    # Schedule task 0, complete it, then stop
+    asyncio.run(
+        schedule.schedule_day_async(fetch_ideas, analysis_cache,
+                                    scripted(['s', '', '0', '', ''],
+                                             on_answer)))
+    assert analysis_cache.full is not None
+    # Once before the selection, once after completing the task
+    assert len(fetched) == 2
+    assert len(timers) == 1 and timers[0].cancelled()
+
+
+def failing_fetch():
+    raise RuntimeError('JIRA is down')
+
+
+def test_awaited_failure_is_reported_once(timers, capsys):
+    with pytest.raises(RuntimeError, match='JIRA is down'):
+        asyncio.run(schedule.schedule_day_async(failing_fetch,
+                                                ask=scripted(['s'])))
+    assert 'background analysis failed' not in capsys.readouterr().out
+
+
+def test_unseen_failure_is_reported(timers, capsys):
+    asyncio.run(schedule.schedule_day_async(failing_fetch,
+                                            ask=scripted([''])))
+    assert capsys.readouterr().out.count(
+        "The background analysis failed: RuntimeError('JIRA is down')") == 1
+
+
+def test_threshold_sweep_matches_masks():
+    full = analyze(lambda: synthetic_backlog(200, seed=11))
+    weights = np.array([w.nominal_value for w in full.weight])
+    sweep = schedule.ThresholdSweep(full,
+                                    learn_boost=np.linspace(0, 1, 11),
+                                    weight_top_of_backlog=[0.5, 5, 50])
+    assert len(sweep.grid) == 33
+    for point, row in sweep.grid.iterrows():
+        assert row.threshold == pytest.approx(
+            schedule.weight_threshold(row.focal_boost,
+                                      row.gamification_boost,
+                                      row.learn_boost,
+                                      row.weight_top_of_backlog))
+        mask = weights >= row.threshold
+        assert row.accepted == mask.sum()
+        assert row.rejected == (~mask).sum()
+        accepted = sweep.tasks(point)
+        assert set(accepted) == set(full.index[mask])
+        assert set(sweep.tasks(point, accepted=False)) == set(
+            full.index[~mask])
+        # Weightiest first
+        assert np.all(np.diff(weights[full.index.get_indexer(accepted)]) <= 0)
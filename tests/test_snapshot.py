@@ -0,0 +1,76 @@
+from datetime import datetime
+from unittest import mock
+
+import pytest
+
+from benchmarks.synthetic import synthetic_backlog
+from taskbacklog import snapshot
+from taskbacklog.analysis import AnalysisCache, analyze
+from taskbacklog.issues import Task
+
+
+@pytest.fixture
+def saved(tmp_path):
+    pbis = synthetic_backlog(200, seed=6)
+    full = analyze(lambda: pbis)
+    path = str(tmp_path / 'snapshot.pkl')
+    snapshot.save_snapshot(path, pbis, full, b'png', '<table>',
+                           datetime.now(), 'fingerprint')
+    return path, pbis, full
+
+
+def test_round_trip(saved):
+    path, pbis, full = saved
+    loaded = snapshot.load_snapshot(path, 'fingerprint')
+    assert list(loaded['full'].index) == list(full.index)
+    for before, after in zip(full.weight, loaded['full'].weight):
+        assert after.nominal_value == before.nominal_value
+        assert after.std_dev == pytest.approx(before.std_dev, rel=1e-12)
+    # Correlations survive: a weight and its estimate share variables.
+    before = full.weight.iloc[0] - full.estimate.iloc[0]
+    after = loaded['full'].weight.iloc[0] - loaded['full'].estimate.iloc[0]
+    assert after.std_dev == pytest.approx(before.std_dev, rel=1e-12)
+    weight = loaded['full'].weight.iloc[0]
+    assert (weight - weight).std_dev == 0
+    # Shared objects stay shared.
+    tasks = [task for pbi in loaded['pbis'] for task in pbi.tasks]
+    assert len({id(task.value_dimensions) for task in tasks}) == len(
+        {id(task.value_dimensions) for pbi in pbis for task in pbi.tasks})
+    assert (loaded['image'], loaded['html']) == (b'png', '<table>')
+
+
+def test_stale_or_broken_snapshots_are_misses(saved, tmp_path):
+    path, pbis, full = saved
+    assert snapshot.load_snapshot(path, 'other') is None
+    with mock.patch.object(snapshot, 'package_fingerprint', lambda: 'x'):
+        assert snapshot.load_snapshot(path, 'fingerprint') is None
+    truncated = tmp_path / 'truncated.pkl'
+    with open(path, 'rb') as f:
+        truncated.write_bytes(f.read()[:1000])
+    assert snapshot.load_snapshot(str(truncated), 'fingerprint') is None
+    assert snapshot.load_snapshot(str(tmp_path / 'missing'), 'f') is None
+
+    class NotebookTask(Task):
+        pass
+
+    pbis[0].tasks[0].__class__ = NotebookTask
+    snapshot.save_snapshot(path, pbis, full, b'', '', datetime.now(), 'f')
+    assert snapshot.load_snapshot(path, 'f') is None
+
+
+def test_analysis_cache_loads_without_fetching(tmp_path):
+    pbis = synthetic_backlog(50, seed=7)
+    calls = []
+
+    def fetch_ideas():
+        calls.append(None)
+        return pbis
+
+    path = str(tmp_path / 'snapshot.pkl')
+    assert AnalysisCache(snapshot=path).prepare(fetch_ideas)
+    cache = AnalysisCache(snapshot=path)
+    assert not cache.prepare(fetch_ideas)
+    assert len(calls) == 1 and len(cache.full) == 50
+    # Later calls fetch, and find the same backlog as the loaded one.
+    assert not cache.prepare(fetch_ideas)
+    assert len(calls) == 2
@@ -0,0 +1,42 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import synthetic_backlog
+from taskbacklog.analysis import analyze, task_columns
+from taskbacklog.issues import PBI, Task, ValueDimensions
+from taskbacklog.store import BacklogStore
+
+
+@pytest.fixture(scope='module')
+def pbis():
+    return synthetic_backlog(300, seed=2)
+
+
+def test_columns_match_task_columns(pbis):
+    pd.testing.assert_frame_equal(
+        BacklogStore.from_pbis(pbis).columns(), task_columns(pbis))
+
+
+def test_ranks_like_columnar(pbis):
+    store = analyze(BacklogStore.from_pbis(pbis))
+    columnar = analyze(lambda: pbis, columnar=True)
+    assert list(store.summary) == list(columnar.summary)
+    np.testing.assert_allclose(store.calendar_distance_hours.values,
+                               columnar.calendar_distance_hours.values,
+                               rtol=1e-12)
+
+
+def test_descriptions_round_trip():
+    vd = ValueDimensions(0.1)
+    descriptions = [None, '', 'Größe — 大きさ', 'plain']
+    tasks = [
+        Task(str(i), 1.0, vd, description=description)
+        for i, description in enumerate(descriptions)
+    ]
+    store = BacklogStore.from_pbis(
+        [PBI('p', 5.0, date(2020, 1, 1), vd, tasks=tasks)])
+    assert [store.description(i) for i in reversed(range(len(store)))
+            ] == [description or '' for description in reversed(descriptions)]